@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
 import os
+import tarfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from tqdm import tqdm
 
+from . import jsonio
 from .schema import ALLOWED_CATEGORIES, Category, DatasetManifest, ItemExpected, ItemInput, ItemMeta, write_json_schema
-from .safety import ensure_safe_text
-from .gpt import call_structured
+from .gpt import StructuredRequest, acall_structured, call_structured_batch
+from .safety import aclose_openai_client, aensure_safe_text, ensure_safe_text
 
 
 # Structured outputs for specific categories
@@ -29,12 +35,33 @@ class IncidentSummaryOut(BaseModel):
     lessons: List[str] = Field(default_factory=list)
 
 
+class DocSynthesisBatchOut(BaseModel):
+    items: List[DocSynthesisOut] = Field(default_factory=list, description="One entry per numbered task, in order")
+
+
+class IncidentSummaryBatchOut(BaseModel):
+    items: List[IncidentSummaryOut] = Field(default_factory=list, description="One entry per numbered task, in order")
+
+
+# Max in-flight LLM/moderation requests during generation
+DEFAULT_CONCURRENCY = int(os.environ.get("DS_CONCURRENCY", "8"))
+# Items per structured LLM request for DOC/IMS
+DEFAULT_BATCH_SIZE = int(os.environ.get("DS_BATCH_SIZE", "10"))
+# Threads for the per-item directory writes
+_WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# dir: items/<id>/... tree; jsonl: one record per line in items.jsonl; tar: the dir tree packed in items.tar
+OUTPUT_FORMATS = ["dir", "jsonl", "tar"]
+
+
 @dataclass
 class GenConfig:
     out_dir: Path
     count: int
     categories: List[Category]
     offline: bool = False
+    concurrency: int = DEFAULT_CONCURRENCY
+    batch_size: int = DEFAULT_BATCH_SIZE
+    format: str = "dir"  # one of OUTPUT_FORMATS
 
 
 BENIGN_TEMPLATES: Dict[Category, List[str]] = {
@@ -64,6 +91,17 @@ def _ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def _wtxt(path: Path, content: str | bytes) -> None:
+    # Small item files: one raw write, skipping the TextIOWrapper/BufferedWriter layers
+    data = memoryview(content.encode("utf-8") if isinstance(content, str) else content)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
 def _make_input_for_category(cat: Category, idx: int) -> ItemInput:
     if cat == Category.CF:
         code = """def greet(n):\n    # prints a greeting n times\n    for i in range(0, n):\n        print('hello')\n"""
@@ -100,86 +138,408 @@ def _expected_for_category(cat: Category) -> ItemExpected:
     raise ValueError("unsupported category")
 
 
-def _safe_doc(cat: Category, user_prompt: str) -> str:
+_DOC_SYSTEM = "You are a helpful technical writer. Only produce benign, high-level content."
+_IMS_SYSTEM = "You are a careful SRE. Summarize benign incidents with constructive lessons."
+
+# Safe fallbacks when a structured call fails
+_DOC_FALLBACK = DocSynthesisOut(title="Benign Documentation", bullets=["Overview", "Usage", "Examples"])
+_IMS_FALLBACK = IncidentSummaryOut(summary="Minor slowdown resolved with retry policy.", lessons=["Improve monitoring", "Tune timeouts", "Document runbooks"])
+
+
+def _render_doc(out: DocSynthesisOut) -> str:
+    return "# " + out.title + "\n\n" + "\n".join(f"- {b}" for b in out.bullets)
+
+
+def _render_incident(out: IncidentSummaryOut) -> str:
+    return out.summary + "\n\n" + "\n".join(f"- {l}" for l in out.lessons)
+
+
+async def _safe_doc(cat: Category, user_prompt: str) -> str:
     if cat == Category.DOC:
         try:
-            out = call_structured(
-                system_prompt="You are a helpful technical writer. Only produce benign, high-level content.",
+            out = await acall_structured(
+                system_prompt=_DOC_SYSTEM,
                 user_prompt=user_prompt,
                 schema_model=DocSynthesisOut,
             )
         except Exception:
-            # Safe fallback
-            out = DocSynthesisOut(title="Benign Documentation", bullets=["Overview", "Usage", "Examples"])  # type: ignore
-        return "# " + out.title + "\n\n" + "\n".join(f"- {b}" for b in out.bullets)
+            out = _DOC_FALLBACK
+        return _render_doc(out)  # type: ignore[arg-type]
     if cat == Category.IMS:
         try:
-            out = call_structured(
-                system_prompt="You are a careful SRE. Summarize benign incidents with constructive lessons.",
+            out = await acall_structured(
+                system_prompt=_IMS_SYSTEM,
                 user_prompt=user_prompt,
                 schema_model=IncidentSummaryOut,
             )
         except Exception:
-            # Safe fallback
-            out = IncidentSummaryOut(summary="Minor slowdown resolved with retry policy.", lessons=["Improve monitoring", "Tune timeouts", "Document runbooks"])  # type: ignore
-        text = out.summary + "\n\n" + "\n".join(f"- {l}" for l in out.lessons)
-        return text
+            out = _IMS_FALLBACK
+        return _render_incident(out)  # type: ignore[arg-type]
     # Fallback for other cats: echo instructive text only
     return "Provide a short, safe response."
 
 
-def generate_dataset(cfg: GenConfig) -> Dict[str, object]:
-    _ensure_dir(cfg.out_dir)
-    dataset_dir = cfg.out_dir
-    items_dir = dataset_dir / "items"
-    _ensure_dir(items_dir)
+def _batch_prompt(user_prompts: List[str]) -> str:
+    numbered = "\n\n".join(f"{n}. {p}" for n, p in enumerate(user_prompts, start=1))
+    return (
+        f"Complete each of the following {len(user_prompts)} numbered tasks independently. "
+        f'Return {{"items": [...]}} with exactly {len(user_prompts)} entries, in the same order.\n\n'
+        + numbered
+    )
 
-    # Write JSON Schemas
-    write_json_schema(dataset_dir / "schemas")
 
-    ids: List[str] = []
+async def _safe_docs(cat: Category, user_prompts: List[str]) -> List[str]:
+    """Produce expected texts for several prompts of one category with a single structured call.
 
+    Entries the batch response does not cover fall back to per-prompt calls.
+    """
+    if cat == Category.DOC:
+        system_prompt, batch_model, render = _DOC_SYSTEM, DocSynthesisBatchOut, _render_doc
+    elif cat == Category.IMS:
+        system_prompt, batch_model, render = _IMS_SYSTEM, IncidentSummaryBatchOut, _render_incident
+    else:
+        return [await _safe_doc(cat, p) for p in user_prompts]
+    if len(user_prompts) == 1:
+        return [await _safe_doc(cat, user_prompts[0])]
+
+    try:
+        out = await acall_structured(
+            system_prompt=system_prompt,
+            user_prompt=_batch_prompt(user_prompts),
+            schema_model=batch_model,
+        )
+        rendered: List[str] = [render(it) for it in out.items[: len(user_prompts)]]  # type: ignore[attr-defined]
+    except Exception:
+        rendered = []
+    for p in user_prompts[len(rendered):]:
+        rendered.append(await _safe_doc(cat, p))
+    return rendered
+
+
+async def _produce_expected(cat: Category, item_inputs: List[ItemInput]) -> List[str]:
+    # Produce expected content (safe, structured if applicable); prompts were checked up front
+    expected_texts = await _safe_docs(cat, [it.task_prompt for it in item_inputs])
+    for expected_text in expected_texts:
+        await aensure_safe_text(expected_text, context="expected")
+    return expected_texts
+
+
+def _progress(cfg: GenConfig, iterable: Optional[Iterable] = None, total: Optional[int] = None) -> tqdm:
+    # Redraw at most once a second; offline (mock) runs are too fast to need a bar at all
+    return tqdm(
+        iterable,
+        total=total,
+        desc="Generating items",
+        mininterval=1.0,
+        smoothing=0,
+        miniters=max(1, cfg.count // 100),
+        disable=cfg.offline,
+    )
+
+
+async def _gather_bounded(tasks: List[Callable[[], Awaitable[List[str]]]], limit: int, pbar: tqdm) -> List[List[str]]:
+    """Run task factories concurrently with at most `limit` in flight; results keep input order."""
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def _run(task: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        async with sem:
+            res = await task()
+        pbar.update(len(res))
+        return res
+
+    try:
+        return await asyncio.gather(*(_run(t) for t in tasks))
+    finally:
+        pbar.close()
+
+
+def _stage_batches(cats_cycle: List[Category], batch_size: int) -> List[List[int]]:
+    # Group item indices by category; only structured categories benefit from batching
+    by_cat: Dict[Category, List[int]] = {}
+    for i, cat in enumerate(cats_cycle):
+        by_cat.setdefault(cat, []).append(i)
+    batches: List[List[int]] = []
+    for cat, idxs in by_cat.items():
+        size = max(1, batch_size) if cat in (Category.DOC, Category.IMS) else 1
+        batches.extend(idxs[j : j + size] for j in range(0, len(idxs), size))
+    return batches
+
+
+def _plan_items(cfg: GenConfig) -> Tuple[List[Category], List[ItemInput]]:
     cats_cycle = (cfg.categories * ((cfg.count // len(cfg.categories)) + 1))[: cfg.count]
+    inputs = [_make_input_for_category(cat, i) for i, cat in enumerate(cats_cycle)]
+    return cats_cycle, inputs
+
+
+def _distinct_prompts(inputs: List[ItemInput]) -> List[str]:
+    # Template-derived prompts repeat across items; safety checks only need each distinct one
+    return list(dict.fromkeys(it.task_prompt for it in inputs))
+
+
+async def _generate_expected(cfg: GenConfig, cats_cycle: List[Category], inputs: List[ItemInput]) -> List[str]:
+    try:
+        return await _generate_expected_texts(cfg, cats_cycle, inputs)
+    finally:
+        # The loop's AsyncOpenAI client holds pooled connections; don't leave them open
+        await aclose_openai_client()
 
-    for i, cat in enumerate(tqdm(cats_cycle, desc="Generating items")):
-        uid = str(uuid.uuid4())
-        item_dir = items_dir / uid
-        inputs_dir = item_dir / "inputs"
-        expected_dir = item_dir / "expected"
-        _ensure_dir(inputs_dir)
-        _ensure_dir(expected_dir)
-
-        item_input = _make_input_for_category(cat, i)
-        # Safety checks on input prompt
-        ensure_safe_text(item_input.task_prompt, context="item_input")
-
-        # Produce expected content (safe, structured if applicable)
-        exp = _expected_for_category(cat)
-        expected_text = _safe_doc(cat, item_input.task_prompt)
-        ensure_safe_text(expected_text, context="expected")
-
-        # Write files
-        (inputs_dir / "prompt.txt").write_text(item_input.task_prompt, encoding="utf-8")
-        for name, content in item_input.attachments.items():
-            (inputs_dir / name).write_text(content, encoding="utf-8")
 
-        (expected_dir / "description.txt").write_text(exp.description, encoding="utf-8")
-        (expected_dir / "target.txt").write_text(expected_text, encoding="utf-8")
-        (expected_dir / "checks.json").write_text(json.dumps(exp.checks, ensure_ascii=False, indent=2), encoding="utf-8")
+async def _generate_expected_texts(cfg: GenConfig, cats_cycle: List[Category], inputs: List[ItemInput]) -> List[str]:
+    sem = asyncio.Semaphore(max(1, cfg.concurrency))
 
+    async def _check_prompt(prompt: str) -> None:
+        async with sem:
+            await aensure_safe_text(prompt, context="item_input")
+
+    await asyncio.gather(*(_check_prompt(p) for p in _distinct_prompts(inputs)))
+
+    batches = _stage_batches(cats_cycle, cfg.batch_size)
+    tasks = [
+        (lambda b=b: _produce_expected(cats_cycle[b[0]], [inputs[i] for i in b]))
+        for b in batches
+    ]
+    expected_texts: List[str] = [""] * len(cats_cycle)
+    for b, texts in zip(batches, await _gather_bounded(tasks, cfg.concurrency, _progress(cfg, total=len(cats_cycle)))):
+        for i, text in zip(b, texts):
+            expected_texts[i] = text
+    return expected_texts
+
+
+def generate_dataset(cfg: GenConfig) -> Dict[str, object]:
+    """Generate and write the dataset. Drives its own event loop; from async code use agenerate_dataset."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("generate_dataset() cannot run inside a running event loop; await agenerate_dataset() instead")
+
+    cats_cycle, inputs = _plan_items(cfg)
+
+    # LLM and moderation calls are I/O-bound; overlap them, then write files in order
+    expected_texts = asyncio.run(_generate_expected(cfg, cats_cycle, inputs))
+
+    return _write_dataset(cfg, cats_cycle, inputs, expected_texts)
+
+
+async def agenerate_dataset(cfg: GenConfig) -> Dict[str, object]:
+    """Async generate_dataset() for callers already inside an event loop.
+
+    File writing is blocking and runs in a worker thread.
+    """
+    cats_cycle, inputs = _plan_items(cfg)
+    expected_texts = await _generate_expected(cfg, cats_cycle, inputs)
+    return await asyncio.to_thread(_write_dataset, cfg, cats_cycle, inputs, expected_texts)
+
+
+def generate_dataset_batch(cfg: GenConfig) -> Dict[str, object]:
+    """Like generate_dataset, but routes DOC/IMS calls through the OpenAI Batch API.
+
+    Intended for large offline runs where latency does not matter.
+    """
+    cats_cycle, inputs = _plan_items(cfg)
+    for prompt in _distinct_prompts(inputs):
+        ensure_safe_text(prompt, context="item_input")
+
+    specs = {
+        Category.DOC: (_DOC_SYSTEM, DocSynthesisOut, _render_doc),
+        Category.IMS: (_IMS_SYSTEM, IncidentSummaryOut, _render_incident),
+    }
+    requests = [
+        StructuredRequest(
+            custom_id=f"item-{i}",
+            system_prompt=specs[cat][0],
+            user_prompt=inputs[i].task_prompt,
+            schema_model=specs[cat][1],
+        )
+        for i, cat in enumerate(cats_cycle)
+        if cat in specs
+    ]
+    outputs = call_structured_batch(requests) if requests else {}
+
+    expected_texts: List[str] = []
+    for i, cat in enumerate(_progress(cfg, cats_cycle)):
+        if cat in specs:
+            # call_structured_batch returns every custom_id (errored ones are retried)
+            render = specs[cat][2]
+            text = render(outputs[f"item-{i}"])  # type: ignore[operator]
+        else:
+            text = "Provide a short, safe response."
+        ensure_safe_text(text, context="expected")
+        expected_texts.append(text)
+
+    return _write_dataset(cfg, cats_cycle, inputs, expected_texts)
+
+
+def _iter_items(
+    cats_cycle: List[Category],
+    inputs: List[ItemInput],
+    expected_texts: List[str],
+) -> Iterator[Tuple[ItemInput, ItemExpected, str, ItemMeta]]:
+    # One timestamp for the whole generation run and one urandom read for all item ids
+    created_at = _now_iso()
+    rand = os.urandom(16 * len(cats_cycle))
+    for i, (cat, item_input, expected_text) in enumerate(zip(cats_cycle, inputs, expected_texts)):
         meta = ItemMeta(
-            id=uid,
+            id=str(uuid.UUID(bytes=rand[i * 16 : (i + 1) * 16], version=4)),
             category=cat,
-            created_at=_now_iso(),
+            created_at=created_at,
             blacklist_passed=True,
             moderation_passed=True,
         )
-        (item_dir / "meta.json").write_text(meta.model_dump_json(indent=2), encoding="utf-8")
+        yield item_input, _expected_for_category(cat), expected_text, meta
+
+
+def _item_files(item_input: ItemInput, exp: ItemExpected, expected_text: str, meta: ItemMeta) -> Dict[str, str | bytes]:
+    # Relative path -> content for one item directory
+    files: Dict[str, str | bytes] = {"inputs/prompt.txt": item_input.task_prompt}
+    for name, content in item_input.attachments.items():
+        files[f"inputs/{name}"] = content
+    files["expected/description.txt"] = exp.description
+    files["expected/target.txt"] = expected_text
+    files["expected/checks.json"] = jsonio.dumps(exp.checks, indent=True)
+    files["meta.json"] = meta.model_dump_json(indent=2)
+    return files
+
+
+def _item_record(item_input: ItemInput, exp: ItemExpected, expected_text: str, meta: ItemMeta) -> Dict[str, object]:
+    return {
+        "id": meta.id,
+        "category": meta.category.value,
+        "inputs": item_input.model_dump(),
+        "expected": {**exp.model_dump(), "target": expected_text},
+        "meta": meta.model_dump(mode="json"),
+    }
+
+
+def _write_shared_attachments(shared_dir: Path, inputs: List[ItemInput]) -> Dict[str, Tuple[str, Path]]:
+    """Write each attachment body once; returns item-relative path -> (content, shared file)."""
+    shared: Dict[str, Tuple[str, Path]] = {}
+    for item_input in inputs:
+        for name, content in item_input.attachments.items():
+            rel = f"inputs/{name}"
+            if rel in shared:
+                continue
+            _ensure_dir(shared_dir)
+            path = shared_dir / name
+            # New inode via rename: items from an earlier run into this dir stay hardlinked
+            # to the old body instead of seeing it truncated and rewritten in place
+            tmp = shared_dir / f".{name}.{os.getpid()}.tmp"
+            _wtxt(tmp, content)
+            os.replace(tmp, path)
+            shared[rel] = (content, path)
+    return shared
+
+
+def _write_item(
+    items_dir: Path,
+    shared: Dict[str, Tuple[str, Path]],
+    item_input: ItemInput,
+    exp: ItemExpected,
+    expected_text: str,
+    meta: ItemMeta,
+) -> str:
+    item_dir = items_dir / meta.id
+    _ensure_dir(item_dir / "inputs")
+    _ensure_dir(item_dir / "expected")
+    for rel, content in _item_files(item_input, exp, expected_text, meta).items():
+        src = shared.get(rel)
+        if src is not None and src[0] == content:
+            # Constant attachments: hardlink the shared copy instead of rewriting the bytes
+            try:
+                os.link(src[1], item_dir / rel)
+                continue
+            except OSError:
+                pass
+        _wtxt(item_dir / rel, content)
+    return meta.id
+
+
+def _tar_add(tar: tarfile.TarFile, name: str, content: str | bytes, mtime: float) -> None:
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    info.mtime = int(mtime)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _write_manifest(path: Path, fields: Dict[str, object]) -> None:
+    """Stream manifest.json field by field, in the same layout as DatasetManifest.model_dump_json(indent=2).
+
+    Avoids building the whole document (and its UTF-8 copy) in memory for large item lists.
+    """
+    with open(path, "wb", buffering=1 << 20) as fh:
+        fh.write(b"{")
+        for n, (key, value) in enumerate(fields.items()):
+            fh.write((b",\n  " if n else b"\n  ") + jsonio.dumps(key) + b": ")
+            if isinstance(value, list) and value:
+                fh.write(b"[")
+                for m, v in enumerate(value):
+                    fh.write((b",\n    " if m else b"\n    ") + jsonio.dumps(v))
+                fh.write(b"\n  ]")
+            else:
+                fh.write(jsonio.dumps(value))
+        fh.write(b"\n}")
+
+
+_LAYOUTS = {
+    "dir": (
+        "  items/<id>/inputs/*\n  items/<id>/expected/*\n  items/<id>/meta.json\n"
+        "  _shared/*              # attachment bodies, hardlinked into items/<id>/inputs/"
+    ),
+    "jsonl": "  items.jsonl            # one JSON record per item: id, category, inputs, expected, meta",
+    "tar": "  items.tar              # items/<id>/{inputs/*,expected/*,meta.json} packed uncompressed",
+}
+
+
+def _write_dataset(
+    cfg: GenConfig,
+    cats_cycle: List[Category],
+    inputs: List[ItemInput],
+    expected_texts: List[str],
+) -> Dict[str, object]:
+    if cfg.format not in OUTPUT_FORMATS:
+        raise ValueError(f"unsupported format: {cfg.format}")
+    _ensure_dir(cfg.out_dir)
+    dataset_dir = cfg.out_dir
 
-        ids.append(uid)
+    # Write JSON Schemas
+    write_json_schema(dataset_dir / "schemas")
 
-    manifest = DatasetManifest(count=len(ids), categories=list({c for c in cats_cycle}), items=ids)
-    (dataset_dir / "manifest.json").write_text(manifest.model_dump_json(indent=2), encoding="utf-8")
+    ids: List[str] = []
+    items = _iter_items(cats_cycle, inputs, expected_texts)
+
+    if cfg.format == "jsonl":
+        with open(dataset_dir / "items.jsonl", "wb", buffering=1 << 20) as fh:
+            for item_input, exp, expected_text, meta in items:
+                fh.write(jsonio.dumps(_item_record(item_input, exp, expected_text, meta)) + b"\n")
+                ids.append(meta.id)
+    elif cfg.format == "tar":
+        mtime = time.time()
+        with tarfile.open(dataset_dir / "items.tar", "w") as tar:
+            for item_input, exp, expected_text, meta in items:
+                for rel, content in _item_files(item_input, exp, expected_text, meta).items():
+                    _tar_add(tar, f"items/{meta.id}/{rel}", content, mtime)
+                ids.append(meta.id)
+    else:
+        items_dir = dataset_dir / "items"
+        shared = _write_shared_attachments(dataset_dir / "_shared", inputs)
+        # File syscalls release the GIL; overlap them across items. Results keep input order.
+        with ThreadPoolExecutor(max_workers=_WRITE_WORKERS) as ex:
+            futures = [ex.submit(_write_item, items_dir, shared, *item) for item in items]
+            ids.extend(f.result() for f in futures)
+
+    _write_manifest(
+        dataset_dir / "manifest.json",
+        {
+            "version": DatasetManifest.model_fields["version"].default,
+            "count": len(ids),
+            "categories": [c.value for c in dict.fromkeys(cats_cycle)],
+            "items": ids,
+            "format": cfg.format,
+        },
+    )
 
     # Dataset README
     readme = f"""
@@ -200,9 +560,7 @@ Directory layout:
 
 ```
 dataset/
-  items/<id>/inputs/*
-  items/<id>/expected/*
-  items/<id>/meta.json
+{_LAYOUTS[cfg.format]}
   manifest.json
   README.md
 ```
@@ -220,6 +578,10 @@ def main(argv: Optional[List[str]] = None) -> None:
     parser.add_argument("--count", type=int, default=10, help="Number of items to generate")
     parser.add_argument("--categories", nargs="*", default=ALLOWED_CATEGORIES, help="Subset of categories to include")
     parser.add_argument("--offline", action="store_true", help="Do not call OpenAI; produce mock structured outputs")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max concurrent OpenAI requests")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="DOC/IMS items per structured request")
+    parser.add_argument("--batch", action="store_true", help="Use the OpenAI Batch API (slow, cheaper) for large runs")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="dir", help="Item storage layout")
 
     args = parser.parse_args(argv)
 
@@ -229,8 +591,16 @@ def main(argv: Optional[List[str]] = None) -> None:
             parser.error(f"Unsupported category: {c}")
         cats.append(Category(c))
 
-    cfg = GenConfig(out_dir=args.out, count=args.count, categories=cats, offline=args.offline)
-    res = generate_dataset(cfg)
+    cfg = GenConfig(
+        out_dir=args.out,
+        count=args.count,
+        categories=cats,
+        offline=args.offline,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        format=args.format,
+    )
+    res = generate_dataset_batch(cfg) if args.batch else generate_dataset(cfg)
     print(json.dumps(res, indent=2))
 
 
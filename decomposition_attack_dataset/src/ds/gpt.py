@@ -1,27 +1,160 @@
 from __future__ import annotations
 
+import functools
 import json
+import logging
 import os
-from typing import Any, Dict, Optional, Type, get_origin
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type, get_origin
 
 from pydantic import BaseModel
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 try:
-    from openai import OpenAI
+    import openai
 except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
+    openai = None  # type: ignore
 
-from .safety import ensure_safe_text, have_openai
+from . import jsonio
+from .safety import aensure_safe_text, async_openai_client, ensure_safe_text, have_openai, openai_client
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")  # Placeholder; replace with GPT-5 when available
 
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _sdk_supports_json_schema() -> bool:
+    # response_format={"type": "json_schema"} landed in openai 1.40
+    if openai is None:
+        return False
+    parts = re.findall(r"\d+", getattr(openai, "__version__", ""))[:2]
+    return len(parts) == 2 and (int(parts[0]), int(parts[1])) >= (1, 40)
+
+
+# Invariant per install; decided once instead of probing with a failing call
+_SUPPORTS_JSON_SCHEMA = _sdk_supports_json_schema()
+
+
+@dataclass
+class StructuredRequest:
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    schema_model: Type[BaseModel]
+
 
 def responses_client() -> Optional[Any]:
     if not have_openai():
         return None
-    return OpenAI()
+    return openai_client()
+
+
+def async_responses_client() -> Optional[Any]:
+    if not have_openai():
+        return None
+    return async_openai_client()
+
+
+@functools.lru_cache(maxsize=32)
+def _mock_defaults(schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    # Offline mock: populate minimal fields safely using typing inspection
+    data: Dict[str, Any] = {}
+    for name, field in schema_model.model_fields.items():
+        ann = field.annotation
+        origin = get_origin(ann)
+        if ann is str:
+            data[name] = f"mock {name}"
+        elif origin is list:
+            data[name] = []
+        elif origin is dict:
+            data[name] = {}
+        elif ann in (int, float):
+            data[name] = 0
+        elif ann is bool:
+            data[name] = False
+        else:
+            data[name] = None
+    return data
+
+
+def _mock_structured(schema_model: Type[BaseModel]) -> BaseModel:
+    # Mock values are known-safe, so skip validation; copy containers so cached defaults stay pristine
+    data = {k: (v.copy() if isinstance(v, (list, dict)) else v) for k, v in _mock_defaults(schema_model).items()}
+    return schema_model.model_construct(**data)
+
+
+def _strict_schema(node: Any) -> Any:
+    # Structured Outputs strict mode requires every object to list all of its properties
+    # as required and to forbid additional properties; it also rejects "default"
+    if isinstance(node, dict):
+        out = {k: _strict_schema(v) for k, v in node.items() if k != "default"}
+        if out.get("type") == "object" and "properties" in out:
+            out["required"] = list(out["properties"])
+            out["additionalProperties"] = False
+        return out
+    if isinstance(node, list):
+        return [_strict_schema(v) for v in node]
+    return node
+
+
+@functools.lru_cache(maxsize=32)
+def _schema_payload(schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    # model_json_schema() walks the whole model; schema models are reused for every item
+    return {
+        "name": schema_model.__name__,
+        "schema": _strict_schema(schema_model.model_json_schema()),
+        "strict": True,
+    }
+
+
+def _json_instruction(schema_payload: Dict[str, Any]) -> str:
+    # SDK may not support json_schema response_format yet. Instruct strict JSON only.
+    return (
+        "Return ONLY a JSON object that strictly matches this JSON Schema. "
+        "Do not include any extra text.\nSCHEMA:\n" + json.dumps(schema_payload["schema"])
+    )
+
+
+def _chat_kwargs(system_prompt: str, user_prompt: str, schema_model: Type[BaseModel], model: str) -> Dict[str, Any]:
+    schema_payload = _schema_payload(schema_model)
+    if not _SUPPORTS_JSON_SCHEMA:
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt + "\n" + _json_instruction(schema_payload)},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": 0.2,
+        }
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": schema_payload,
+        },
+        "temperature": 0.2,
+    }
+
+
+def _parse_structured(out_text: str, schema_model: Type[BaseModel]) -> BaseModel:
+    try:
+        obj = jsonio.loads(out_text)
+    except Exception:
+        obj = {}
+    try:
+        return schema_model.model_validate(obj)
+    except Exception:
+        # As a final fallback, return a safe mock conforming to the schema
+        return _mock_structured(schema_model)
 
 
 @retry(wait=wait_exponential(multiplier=1, min=1, max=8), stop=stop_after_attempt(3))
@@ -41,60 +174,11 @@ def call_structured(
 
     client = responses_client()
     if client is None:
-        # Offline mock: populate minimal fields safely using typing inspection
-        data = {}
-        for name, field in schema_model.model_fields.items():
-            ann = field.annotation
-            origin = get_origin(ann)
-            if ann is str:
-                data[name] = f"mock {name}"
-            elif origin is list:
-                data[name] = []
-            elif origin is dict:
-                data[name] = {}
-            elif ann in (int, float):
-                data[name] = 0
-            elif ann is bool:
-                data[name] = False
-            else:
-                data[name] = None
-        return schema_model.model_validate(data)
-
-    schema_payload = {
-        "name": schema_model.__name__,
-        "schema": schema_model.model_json_schema(),
-        "strict": True,
-    }
+        return _mock_structured(schema_model)
 
-    # Attempt Chat Completions with JSON Schema response format first
+    # Chat Completions with JSON Schema response format (or strict-JSON instructions on older SDKs)
     try:
-        chat = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": schema_payload,
-            },
-            temperature=0.2,
-        )
-        out_text = chat.choices[0].message.content or "{}"
-    except TypeError:
-        # SDK may not support json_schema response_format yet. Instruct strict JSON only.
-        json_instr = (
-            "Return ONLY a JSON object that strictly matches this JSON Schema. "
-            "Do not include any extra text.\nSCHEMA:\n" + json.dumps(schema_payload["schema"])  # type: ignore
-        )
-        chat = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt + "\n" + json_instr},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-        )
+        chat = client.chat.completions.create(**_chat_kwargs(system_prompt, user_prompt, schema_model, model))
         out_text = chat.choices[0].message.content or "{}"
     except Exception:
         # Final fallback to Responses API without response_format
@@ -111,29 +195,117 @@ def call_structured(
             out_text = json.dumps(getattr(response, "output", {}))
 
     ensure_safe_text(out_text, context="model_output")
+    return _parse_structured(out_text, schema_model)
+
+
+@retry(wait=wait_exponential(multiplier=1, min=1, max=8), stop=stop_after_attempt(3))
+async def acall_structured(
+    system_prompt: str,
+    user_prompt: str,
+    schema_model: Type[BaseModel],
+    model: str = DEFAULT_MODEL,
+) -> BaseModel:
+    """Async variant of call_structured using AsyncOpenAI.
+
+    Same fallbacks and safety checks; lets callers overlap many requests.
+    """
+    await aensure_safe_text(system_prompt, context="system")
+    await aensure_safe_text(user_prompt, context="user")
+
+    client = async_responses_client()
+    if client is None:
+        return _mock_structured(schema_model)
 
     try:
-        obj = json.loads(out_text)
-    except Exception:
-        obj = {}
-    try:
-        return schema_model.model_validate(obj)
+        chat = await client.chat.completions.create(**_chat_kwargs(system_prompt, user_prompt, schema_model, model))
+        out_text = chat.choices[0].message.content or "{}"
     except Exception:
-        # As a final fallback, return a safe mock conforming to the schema
-        data = {}
-        for name, field in schema_model.model_fields.items():
-            ann = field.annotation
-            origin = get_origin(ann)
-            if ann is str:
-                data[name] = f"mock {name}"
-            elif origin is list:
-                data[name] = []
-            elif origin is dict:
-                data[name] = {}
-            elif ann in (int, float):
-                data[name] = 0
-            elif ann is bool:
-                data[name] = False
-            else:
-                data[name] = None
-        return schema_model.model_validate(data)
+        response = await client.responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt + "\nReturn only JSON."},
+            ],
+        )
+        try:
+            out_text = response.output_text  # type: ignore[attr-defined]
+        except Exception:
+            out_text = json.dumps(getattr(response, "output", {}))
+
+    await aensure_safe_text(out_text, context="model_output")
+    return _parse_structured(out_text, schema_model)
+
+
+def call_structured_batch(
+    requests: List[StructuredRequest],
+    model: str = DEFAULT_MODEL,
+    poll_interval: float = 30.0,
+) -> Dict[str, BaseModel]:
+    """Run many structured calls through the OpenAI Batch API (24h window, lower cost).
+
+    Uploads one JSONL of chat completion requests, polls until the batch finishes,
+    and parses each output line back into its schema model. Requests that errored or
+    are missing from the output are logged and retried one by one via call_structured
+    (which has the Responses API fallback), so the returned dict, keyed by custom_id,
+    covers every request. Falls back to offline mocks if OPENAI_API_KEY is not set.
+    """
+    for req in requests:
+        ensure_safe_text(req.system_prompt, context="system")
+        ensure_safe_text(req.user_prompt, context="user")
+
+    client = responses_client()
+    if client is None:
+        return {req.custom_id: _mock_structured(req.schema_model) for req in requests}
+
+    lines = []
+    for req in requests:
+        body = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": req.system_prompt},
+                {"role": "user", "content": req.user_prompt},
+            ],
+            "response_format": {"type": "json_schema", "json_schema": _schema_payload(req.schema_model)},
+            "temperature": 0.2,
+        }
+        lines.append(jsonio.dumps({"custom_id": req.custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}))
+    batch_input = b"\n".join(lines) + b"\n"
+
+    input_file = client.files.create(file=("batch_input.jsonl", batch_input), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+
+    schemas = {req.custom_id: req.schema_model for req in requests}
+    results: Dict[str, BaseModel] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        rec = jsonio.loads(line)
+        schema_model = schemas.get(rec.get("custom_id"))
+        response = rec.get("response") or {}
+        if schema_model is None or rec.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            out_text = response["body"]["choices"][0]["message"]["content"] or "{}"
+        except (KeyError, IndexError, TypeError):
+            continue
+        ensure_safe_text(out_text, context="model_output")
+        results[rec["custom_id"]] = _parse_structured(out_text, schema_model)
+
+    failed = [req for req in requests if req.custom_id not in results]
+    if failed:
+        logger.warning(
+            "OpenAI batch %s: %d of %d requests errored or are missing; retrying individually: %s",
+            batch.id, len(failed), len(requests), ", ".join(req.custom_id for req in failed),
+        )
+        for req in failed:
+            results[req.custom_id] = call_structured(req.system_prompt, req.user_prompt, req.schema_model, model=model)
+    return results
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import os
 import re
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 try:
-    from openai import OpenAI
+    import ahocorasick
+except Exception:  # pragma: no cover - optional C-backed matcher
+    ahocorasick = None  # type: ignore
+
+try:
+    from openai import AsyncOpenAI, OpenAI
 except Exception:  # pragma: no cover - allow import without openai
+    AsyncOpenAI = None  # type: ignore
     OpenAI = None  # type: ignore
 
 
@@ -31,34 +42,86 @@ BLACKLIST_PATTERNS = [
 ]
 
 
+def _build_term_automaton():
+    # Single-pass multi-term scanner over lowercased text; values are indices into BLACKLIST_TERMS
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, term in enumerate(BLACKLIST_TERMS):
+        automaton.add_word(term.lower(), idx)
+    automaton.make_automaton()
+    return automaton
+
+
+_TERM_AC = _build_term_automaton()
+# Case-insensitive alternation scans the original text, so the no-match path allocates no lowercase copy
+_TERMS_RE = re.compile("|".join(re.escape(term) for term in BLACKLIST_TERMS), re.IGNORECASE)
+_PAT_RES = [re.compile(pat) for pat in BLACKLIST_PATTERNS]
+_PAT_RE = re.compile("|".join(f"(?:{pat})" for pat in BLACKLIST_PATTERNS))
+
+
+def _term_hits(text: str) -> List[int]:
+    if _TERM_AC is not None:
+        return sorted({idx for _, idx in _TERM_AC.iter(text.lower())})
+    if _TERMS_RE.search(text) is None:
+        return []
+    # Alternation skips overlapping terms; enumerate exactly on the (rare) hit path
+    t = text.lower()
+    return [idx for idx, term in enumerate(BLACKLIST_TERMS) if term.lower() in t]
+
+
+def _blacklist_reasons(text: str) -> Tuple[str, ...]:
+    reasons = [f"term:{BLACKLIST_TERMS[idx]}" for idx in _term_hits(text)]
+    if _PAT_RE.search(text) is not None:
+        reasons.extend(f"pattern:{rx.pattern}" for rx in _PAT_RES if rx.search(text))
+    return tuple(reasons)
+
+
+# Prompts built from templates repeat verbatim; memoize scans of short inputs
+_blacklist_reasons_cached = functools.lru_cache(maxsize=1024)(_blacklist_reasons)
+_BLACKLIST_MEMO_MAX_CHARS = 4096
+
+
 def local_blacklist_ok(text: str) -> Tuple[bool, List[str]]:
     if not text:
         return True, []
-    t = text.lower()
-    reasons: List[str] = []
-    for term in BLACKLIST_TERMS:
-        if term.lower() in t:
-            reasons.append(f"term:{term}")
-    for pat in BLACKLIST_PATTERNS:
-        if re.search(pat, text):
-            reasons.append(f"pattern:{pat}")
-    return len(reasons) == 0, reasons
+    if len(text) <= _BLACKLIST_MEMO_MAX_CHARS:
+        reasons = _blacklist_reasons_cached(text)
+    else:
+        reasons = _blacklist_reasons(text)
+    return len(reasons) == 0, list(reasons)
 
 
 def have_openai() -> bool:
     return OpenAI is not None and bool(os.environ.get("OPENAI_API_KEY"))
 
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=8), stop=stop_after_attempt(3))
-def moderate_text(text: str) -> Tuple[bool, Dict]:
-    """Return (allowed, raw_response). Uses OpenAI Moderation if available, otherwise allows by default."""
-    if not have_openai():
-        return True, {"mock": True}
-    client = OpenAI()
-    resp = client.moderations.create(
-        model="omni-moderation-latest",
-        input=text[:4000],
-    )
+@functools.lru_cache(maxsize=1)
+def openai_client() -> "OpenAI":
+    """Process-wide OpenAI client, so calls share one connection pool (keep-alive, no repeated TLS setup)."""
+    return OpenAI()
+
+
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+def async_openai_client() -> "AsyncOpenAI":
+    """AsyncOpenAI client shared within the running event loop (its connection pool is loop-bound)."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = _ASYNC_CLIENTS[loop] = AsyncOpenAI()
+    return client
+
+
+async def aclose_openai_client() -> None:
+    """Close the running loop's AsyncOpenAI client, if any; the next call creates a fresh one."""
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def _moderation_verdict(resp: object) -> Tuple[bool, Dict]:
     # Newer SDK returns a structured object; attempt to read allowed flag
     try:
         result = resp.results[0]  # type: ignore[attr-defined]
@@ -68,6 +131,85 @@ def moderate_text(text: str) -> Tuple[bool, Dict]:
         return True, {"raw": str(resp)}
 
 
+# Moderation verdicts keyed by blake2b of the text actually sent (first 4000 chars)
+_MODERATION_INPUT_CHARS = 4000
+_MODERATION_CACHE_SIZE = 4096
+_MODERATION_CACHE: "OrderedDict[str, Tuple[bool, Dict]]" = OrderedDict()
+_MODERATION_INFLIGHT: Dict[str, "asyncio.Task[Tuple[bool, Dict]]"] = {}
+
+
+def _moderation_key(text: str) -> str:
+    return hashlib.blake2b(text[:_MODERATION_INPUT_CHARS].encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _moderation_cache_get(key: str) -> Optional[Tuple[bool, Dict]]:
+    hit = _MODERATION_CACHE.get(key)
+    if hit is not None:
+        _MODERATION_CACHE.move_to_end(key)
+    return hit
+
+
+def _moderation_cache_put(key: str, verdict: Tuple[bool, Dict]) -> None:
+    _MODERATION_CACHE[key] = verdict
+    _MODERATION_CACHE.move_to_end(key)
+    if len(_MODERATION_CACHE) > _MODERATION_CACHE_SIZE:
+        _MODERATION_CACHE.popitem(last=False)
+
+
+@retry(wait=wait_exponential(multiplier=1, min=1, max=8), stop=stop_after_attempt(3))
+def _moderate_remote(text: str) -> Tuple[bool, Dict]:
+    client = openai_client()
+    resp = client.moderations.create(
+        model="omni-moderation-latest",
+        input=text[:_MODERATION_INPUT_CHARS],
+    )
+    return _moderation_verdict(resp)
+
+
+@retry(wait=wait_exponential(multiplier=1, min=1, max=8), stop=stop_after_attempt(3))
+async def _amoderate_remote(text: str) -> Tuple[bool, Dict]:
+    client = async_openai_client()
+    resp = await client.moderations.create(
+        model="omni-moderation-latest",
+        input=text[:_MODERATION_INPUT_CHARS],
+    )
+    return _moderation_verdict(resp)
+
+
+def moderate_text(text: str) -> Tuple[bool, Dict]:
+    """Return (allowed, raw_response). Uses OpenAI Moderation if available, otherwise allows by default.
+
+    Verdicts are cached by content hash, so repeated texts cost one API call.
+    """
+    if not have_openai():
+        return True, {"mock": True}
+    key = _moderation_key(text)
+    hit = _moderation_cache_get(key)
+    if hit is not None:
+        return hit
+    verdict = _moderate_remote(text)
+    _moderation_cache_put(key, verdict)
+    return verdict
+
+
+async def amoderate_text(text: str) -> Tuple[bool, Dict]:
+    """Async variant of moderate_text; concurrent requests for the same text share one call."""
+    if not have_openai():
+        return True, {"mock": True}
+    key = _moderation_key(text)
+    hit = _moderation_cache_get(key)
+    if hit is not None:
+        return hit
+    task = _MODERATION_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_amoderate_remote(text))
+        _MODERATION_INFLIGHT[key] = task
+        task.add_done_callback(lambda _t: _MODERATION_INFLIGHT.pop(key, None))
+    verdict = await asyncio.shield(task)
+    _moderation_cache_put(key, verdict)
+    return verdict
+
+
 def ensure_safe_text(text: str, *, context: str) -> None:
     ok_local, reasons = local_blacklist_ok(text)
     if not ok_local:
@@ -75,3 +217,12 @@ def ensure_safe_text(text: str, *, context: str) -> None:
     ok_mod, _ = moderate_text(text)
     if not ok_mod:
         raise ValueError(f"Text failed moderation ({context})")
+
+
+async def aensure_safe_text(text: str, *, context: str) -> None:
+    ok_local, reasons = local_blacklist_ok(text)
+    if not ok_local:
+        raise ValueError(f"Text failed local safety checks ({context}): {', '.join(reasons)}")
+    ok_mod, _ = await amoderate_text(text)
+    if not ok_mod:
+        raise ValueError(f"Text failed moderation ({context})")
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import json
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
+from . import jsonio
+
 
 ALLOWED_CATEGORIES = ["CF", "CFG", "DI", "DOC", "IMS"]
 
@@ -45,19 +46,10 @@ class DatasetManifest(BaseModel):
     count: int
     categories: List[Category]
     items: List[str]
+    format: Literal["dir", "jsonl", "tar"] = "dir"
 
 
 def write_json_schema(out_dir: Path) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "ItemInput.schema.json").write_text(
-        json.dumps(ItemInput.model_json_schema(), ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-    (out_dir / "ItemExpected.schema.json").write_text(
-        json.dumps(ItemExpected.model_json_schema(), ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-    (out_dir / "ItemMeta.schema.json").write_text(
-        json.dumps(ItemMeta.model_json_schema(), ensure_ascii=False, indent=2), encoding="utf-8"
-    )
-    (out_dir / "DatasetManifest.schema.json").write_text(
-        json.dumps(DatasetManifest.model_json_schema(), ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    for model in (ItemInput, ItemExpected, ItemMeta, DatasetManifest):
+        (out_dir / f"{model.__name__}.schema.json").write_bytes(jsonio.dumps(model.model_json_schema(), indent=True))
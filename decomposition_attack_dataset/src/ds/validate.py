@@ -1,16 +1,22 @@
 from __future__ import annotations
 
-import json
+import tarfile
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
+from . import jsonio
 from .schema import DatasetManifest, ItemExpected, ItemInput, ItemMeta
 
 
+# Built once and reused for every item in the validation loop
+_META_TA = TypeAdapter(ItemMeta)
+_MANI_TA = TypeAdapter(DatasetManifest)
+
+
 def _read_json(path: Path) -> Dict:
-    return json.loads(path.read_text(encoding="utf-8"))
+    return jsonio.loads(path.read_bytes())
 
 
 def validate_item_dir(item_dir: Path) -> Tuple[bool, List[str]]:
@@ -25,7 +31,7 @@ def validate_item_dir(item_dir: Path) -> Tuple[bool, List[str]]:
         return False, errs
 
     try:
-        ItemMeta.model_validate_json(meta_path.read_text(encoding="utf-8"))
+        _META_TA.validate_json(meta_path.read_bytes())
     except ValidationError as e:
         errs.append(f"meta invalid: {e}")
 
@@ -37,7 +43,61 @@ def validate_item_dir(item_dir: Path) -> Tuple[bool, List[str]]:
         errs.append("expected/checks.json missing")
     else:
         try:
-            _ = json.loads(checks_path.read_text(encoding="utf-8"))
+            _ = jsonio.loads(checks_path.read_bytes())
+        except Exception as e:
+            errs.append(f"checks.json invalid: {e}")
+
+    return len(errs) == 0, errs
+
+
+def validate_item_record(rec: Dict) -> Tuple[bool, List[str]]:
+    """Validate one items.jsonl record (format="jsonl")."""
+    errs: List[str] = []
+
+    try:
+        _META_TA.validate_python(rec.get("meta"))
+    except ValidationError as e:
+        errs.append(f"meta invalid: {e}")
+
+    if not (rec.get("inputs") or {}).get("task_prompt"):
+        errs.append("inputs.task_prompt missing")
+
+    if not isinstance((rec.get("expected") or {}).get("checks"), dict):
+        errs.append("expected.checks missing or invalid")
+
+    return len(errs) == 0, errs
+
+
+def validate_item_tar(tar: tarfile.TarFile, item_id: str) -> Tuple[bool, List[str]]:
+    """Validate one item packed under items/<id>/ in items.tar (format="tar")."""
+    errs: List[str] = []
+    prefix = f"items/{item_id}/"
+
+    def _read(rel: str) -> bytes | None:
+        try:
+            f = tar.extractfile(prefix + rel)
+        except KeyError:
+            return None
+        return f.read() if f is not None else None
+
+    meta = _read("meta.json")
+    if meta is None:
+        errs.append("missing required files/directories")
+        return False, errs
+    try:
+        _META_TA.validate_json(meta)
+    except ValidationError as e:
+        errs.append(f"meta invalid: {e}")
+
+    if _read("inputs/prompt.txt") is None:
+        errs.append("inputs/prompt.txt missing")
+
+    checks = _read("expected/checks.json")
+    if checks is None:
+        errs.append("expected/checks.json missing")
+    else:
+        try:
+            _ = jsonio.loads(checks)
         except Exception as e:
             errs.append(f"checks.json invalid: {e}")
 
@@ -51,14 +111,34 @@ def validate_dataset(root: Path) -> Tuple[bool, List[str]]:
         errs.append("manifest.json missing")
         return False, errs
     try:
-        manifest = DatasetManifest.model_validate_json(manifest_path.read_text(encoding="utf-8"))
+        manifest = _MANI_TA.validate_json(manifest_path.read_bytes())
     except ValidationError as e:
         errs.append(f"manifest invalid: {e}")
         return False, errs
 
-    for item_id in manifest.items:
-        ok, sub_errs = validate_item_dir(root / "items" / item_id)
+    def _collect(item_id: str, ok: bool, sub_errs: List[str]) -> None:
         if not ok:
             errs.extend([f"{item_id}: {e}" for e in sub_errs])
 
+    if manifest.format == "jsonl":
+        records: Dict[str, Dict] = {}
+        with (root / "items.jsonl").open("rb") as fh:
+            for line in fh:
+                if line.strip():
+                    rec = jsonio.loads(line)
+                    records[rec.get("id")] = rec
+        for item_id in manifest.items:
+            rec = records.get(item_id)
+            if rec is None:
+                _collect(item_id, False, ["record missing from items.jsonl"])
+            else:
+                _collect(item_id, *validate_item_record(rec))
+    elif manifest.format == "tar":
+        with tarfile.open(root / "items.tar", "r") as tar:
+            for item_id in manifest.items:
+                _collect(item_id, *validate_item_tar(tar, item_id))
+    else:
+        for item_id in manifest.items:
+            _collect(item_id, *validate_item_dir(root / "items" / item_id))
+
     return len(errs) == 0, errs
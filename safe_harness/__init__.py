@@ -15,17 +15,19 @@ __all__ = [
     "report",
     # Common exports
     "ModelClient",
+    "GenerateResult",
     "ModelClientProtocol",
     "automated_decompose",
     "safe_aggregator",
     "generate_report",
     "SafeContentError",
     "is_safe_text",
+    "is_safe_text_fast",
     "safe_text_ok",
 ]
 
 # Re-export key classes for convenience
-from .clients import ModelClient, ModelClientProtocol  # noqa: E402,F401
+from .clients import GenerateResult, ModelClient, ModelClientProtocol  # noqa: E402,F401
 from .decompose import automated_decompose, safe_aggregator  # noqa: E402,F401
 from .report import generate_report  # noqa: E402,F401
-from .filters import SafeContentError, is_safe_text, safe_text_ok  # noqa: E402,F401
+from .filters import SafeContentError, is_safe_text, is_safe_text_fast, safe_text_ok  # noqa: E402,F401
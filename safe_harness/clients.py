@@ -1,17 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import re
 import time
 from dataclasses import dataclass, field
-from typing import Callable, Optional, Protocol
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
 
-from .filters import is_safe_text, safe_text_ok, SafeContentError
+from .filters import is_safe_text, safe_text_ok, SafeContentError, VerifiedText
+
+
+# One line of model output: optional "-"/"*" bullet run or enumerated "1. " prefix, then the item.
+# Lines without a bullet are kept as-is.
+_BULLET_RE = re.compile(r"^[ \t]*(?:[-*][-* \t]*|\d[^\n]*?\. (?=[^\n]*\S))?([^\n]*?)[ \t\r]*$", re.M)
 
 
 def estimate_tokens(text: str) -> int:
-    """Very rough token estimate: ~1 token per 4 characters (fallback to words)."""
+    """Very rough token estimate: ~1 token per 4 characters (fallback to words for short text)."""
     if not text:
         return 0
-    # Simple heuristic to avoid dependencies
+    # Simple heuristic to avoid dependencies; the character estimate dominates for
+    # normal prose past a few words, so skip the O(N) split() allocation there
+    n = len(text)
+    if n >= 64:
+        return n // 4
+    return _short_text_tokens(text)
+
+
+@functools.lru_cache(maxsize=8192)
+def _short_text_tokens(text: str) -> int:
+    # Short strings (subtasks, mock outputs) repeat across calls; cache the split()
     return max(len(text) // 4, len(text.split()))
 
 
@@ -38,6 +57,19 @@ class ModelAClient:
         # Safe, deterministic behavior for demonstration
         return f"Processed safely by {self.name}: {prompt.strip()[:200]}"
 
+    def call_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """One entry per prompt, None where that prompt's call failed the safety check.
+
+        A real integration would send all prompts in one request.
+        """
+        outputs: List[Optional[str]] = []
+        for p in prompts:
+            try:
+                outputs.append(self.call(p))
+            except SafeContentError:
+                outputs.append(None)
+        return outputs
+
 
 @dataclass
 class ModelBClient:
@@ -70,6 +102,15 @@ class ModelBClient:
         return "\n".join(f"- {s}" for s in suggestions)
 
 
+@dataclass(frozen=True)
+class GenerateResult:
+    """One generate call: the checked output plus its own telemetry."""
+
+    text: str
+    tokens: int
+    latency_sec: float
+
+
 class UnsafeOutputError(RuntimeError):
     """Raised when a model output fails the safety check."""
 
@@ -81,8 +122,10 @@ class ModelClient:
     Contract:
     - generate(prompt, max_tokens, temperature) -> str
     - Records tokens_used (rough estimate) and latency per call
+    - generate_result(...) -> GenerateResult returns them per call instead
     - Supports mock_mode for offline deterministic responses
     - Raises UnsafeOutputError if output fails is_safe_text
+    - Returns checked outputs as VerifiedText (a str) so callers can skip re-checks
 
     Parameters
     - name: Logical model name (for logs)
@@ -90,11 +133,15 @@ class ModelClient:
         (prompt: str, max_tokens: int, temperature: float) -> str
       If None and mock_mode=False, generate() will raise.
     - mock_mode: When True, uses canned deterministic responses.
+    - api_generate_batch_fn: Optional batched variant of api_generate_fn. Signature:
+        (prompts: list[str], max_tokens: int, temperature: float) -> list[str]
+      Used by generate_batch(); when None, prompts go through api_generate_fn one by one.
     """
 
     name: str = "ModelClient"
     api_generate_fn: Optional[Callable[[str, int, float], str]] = None
     mock_mode: bool = False
+    api_generate_batch_fn: Optional[Callable[[List[str], int, float], List[str]]] = None
     last_tokens_used: int = field(default=0, init=False)
     last_latency_sec: float = field(default=0.0, init=False)
 
@@ -108,7 +155,12 @@ class ModelClient:
         content = (body[:max_chars] if max_chars else body) or "(empty prompt)"
         return f"{header} {content}"
 
-    def generate(self, prompt: str, max_tokens: int = 256, temperature: float = 0.7) -> str:
+    def generate_result(self, prompt: str, max_tokens: int = 256, temperature: float = 0.7) -> GenerateResult:
+        """Like generate(), but returns text, token estimate and latency for this call.
+
+        Does not touch last_tokens_used/last_latency_sec, so one client can be
+        shared by concurrent callers.
+        """
         start = time.perf_counter()
 
         if self.mock_mode:
@@ -118,8 +170,7 @@ class ModelClient:
                 raise RuntimeError("api_generate_fn is not set and mock_mode is False")
             output = self.api_generate_fn(prompt, max_tokens, temperature)
 
-        self.last_latency_sec = max(0.0, time.perf_counter() - start)
-        self.last_tokens_used = estimate_tokens(output)
+        latency_sec = max(0.0, time.perf_counter() - start)
 
         # Enforce output safety
         try:
@@ -128,7 +179,79 @@ class ModelClient:
             # Preserve previous external contract while using new safety engine
             raise UnsafeOutputError("Model output failed safety check") from e
 
-        return output
+        return GenerateResult(VerifiedText(output), estimate_tokens(output), latency_sec)
+
+    def generate(self, prompt: str, max_tokens: int = 256, temperature: float = 0.7) -> str:
+        res = self.generate_result(prompt, max_tokens, temperature)
+        self.last_latency_sec = res.latency_sec
+        self.last_tokens_used = res.tokens
+        return res.text
+
+    def _generate_batch_raw(
+        self, prompts: List[str], max_tokens: int, temperature: float
+    ) -> Tuple[List[str], List[float]]:
+        # Unchecked outputs plus the wall-clock latency each prompt waited for its output
+        if self.mock_mode or self.api_generate_batch_fn is not None:
+            start = time.perf_counter()
+            if self.mock_mode:
+                outputs = [self._mock_generate(p, max_tokens, temperature) for p in prompts]
+            else:
+                outputs = list(self.api_generate_batch_fn(prompts, max_tokens, temperature))
+                if len(outputs) != len(prompts):
+                    raise RuntimeError("api_generate_batch_fn returned a different number of outputs")
+            latency_sec = max(0.0, time.perf_counter() - start)
+            return outputs, [latency_sec] * len(outputs)
+
+        if self.api_generate_fn is None:
+            raise RuntimeError("api_generate_fn is not set and mock_mode is False")
+        outputs, latencies = [], []
+        for p in prompts:
+            start = time.perf_counter()
+            outputs.append(self.api_generate_fn(p, max_tokens, temperature))
+            latencies.append(max(0.0, time.perf_counter() - start))
+        return outputs, latencies
+
+    def _check_batch(self, outputs: List[str]) -> List[Optional[str]]:
+        checked: List[Optional[str]] = []
+        for o in outputs:
+            try:
+                is_safe_text(o, context=f"generate:{self.name}")
+                checked.append(VerifiedText(o))
+            except SafeContentError:
+                checked.append(None)
+        return checked
+
+    def generate_batch(
+        self, prompts: List[str], max_tokens: int = 256, temperature: float = 0.7
+    ) -> List[Optional[str]]:
+        """Generate outputs for many prompts with a single backend call.
+
+        Unlike generate(), an unsafe output does not abort the batch: its slot is
+        None. last_tokens_used/last_latency_sec cover the whole batch.
+        """
+        if not prompts:
+            return []
+        start = time.perf_counter()
+        outputs, _ = self._generate_batch_raw(prompts, max_tokens, temperature)
+        self.last_latency_sec = max(0.0, time.perf_counter() - start)
+        self.last_tokens_used = sum(estimate_tokens(o) for o in outputs)
+        return self._check_batch(outputs)
+
+    def generate_batch_results(
+        self, prompts: List[str], max_tokens: int = 256, temperature: float = 0.7
+    ) -> List[Optional[GenerateResult]]:
+        """Like generate_batch(), but returns a GenerateResult per prompt.
+
+        Each latency is the time that prompt waited for its output (the whole
+        backend call when batched). Does not touch last_tokens_used/last_latency_sec.
+        """
+        if not prompts:
+            return []
+        outputs, latencies = self._generate_batch_raw(prompts, max_tokens, temperature)
+        return [
+            None if text is None else GenerateResult(text, estimate_tokens(text), latency_sec)
+            for text, latency_sec in zip(self._check_batch(outputs), latencies)
+        ]
 
     # --- High-level convenience APIs used by orchestration code ---
     def propose_subtasks(self, task_prompt: str, max_items: int = 5) -> list[str]:
@@ -137,8 +260,18 @@ class ModelClient:
         Ensures only safe, short subtasks are returned. In mock_mode, returns
         deterministic canned items without calling the API.
         """
+        items, latency_sec = self.propose_subtasks_timed(task_prompt, max_items)
+        self.last_latency_sec = latency_sec
+        return items
+
+    def propose_subtasks_timed(self, task_prompt: str, max_items: int = 5) -> Tuple[list[str], float]:
+        """propose_subtasks() plus the latency of its model call (0.0 if none was made).
+
+        Does not touch last_tokens_used/last_latency_sec.
+        """
+        latency_sec = 0.0
         if not safe_text_ok(task_prompt):
-            return []
+            return [], latency_sec
 
         if self.mock_mode:
             base = task_prompt.strip().split(" ")[:4]
@@ -154,20 +287,10 @@ class ModelClient:
                 "No sensitive, harmful, or dangerous content. Return only the bullets.\n"
                 f"TASK: {task_prompt}"
             )
-            text = self.generate(instr, max_tokens=256, temperature=0.2)
+            res = self.generate_result(instr, max_tokens=256, temperature=0.2)
+            text, latency_sec = res.text, res.latency_sec
             # Parse bullets: lines starting with -, *, or enumerated 1.
-            raw_lines = [ln.strip() for ln in text.splitlines()]
-            items = []
-            for ln in raw_lines:
-                if not ln:
-                    continue
-                if ln[0] in "-*":
-                    cleaned = ln.lstrip("-* \t").strip()
-                else:
-                    # handle enumerated like "1. step"
-                    cleaned = ln.split(". ", 1)[-1] if ln[0].isdigit() else ln
-                if cleaned:
-                    items.append(cleaned)
+            items = _BULLET_RE.findall(text)
 
         # Safety and length filtering
         safe_items: list[str] = []
@@ -183,7 +306,7 @@ class ModelClient:
             safe_items.append(it)
             if len(safe_items) >= max_items:
                 break
-        return safe_items
+        return safe_items, latency_sec
 
     def solve_subtask(self, subtask_prompt: str, max_tokens: int = 256, temperature: float = 0.2) -> str:
         """Ask the (strong) model to solve a single benign subtask.
@@ -199,10 +322,124 @@ class ModelClient:
             body = subtask_prompt.strip().replace("\n", " ")
             return f"[MOCK_SOLVED:{self.name}] {body[:180]}"
 
-        instr = (
-            "Safely and concisely complete the following benign subtask. "
-            "Avoid any sensitive, harmful, or dangerous content. "
-            "Focus on generic, constructive guidance.\n"
-            f"SUBTASK: {subtask_prompt}"
-        )
-        return self.generate(instr, max_tokens=max_tokens, temperature=temperature)
+        return self.generate(_solve_instruction(subtask_prompt), max_tokens=max_tokens, temperature=temperature)
+
+    def solve_subtasks_batch(
+        self, subtask_prompts: List[str], max_tokens: int = 256, temperature: float = 0.2
+    ) -> List[Optional[str]]:
+        """Batched solve_subtask(): all subtasks go to the model in one generate_batch() call.
+
+        Returns one entry per subtask, None where the subtask prompt or its output
+        failed the safety check. Telemetry per subtask: solve_subtasks_batch_results().
+        """
+        results = self.solve_subtasks_batch_results(subtask_prompts, max_tokens, temperature)
+        return [None if res is None else res.text for res in results]
+
+    def solve_subtasks_batch_results(
+        self, subtask_prompts: List[str], max_tokens: int = 256, temperature: float = 0.2
+    ) -> List[Optional[GenerateResult]]:
+        """solve_subtasks_batch() with a GenerateResult (text, tokens, latency) per subtask.
+
+        Does not touch last_tokens_used/last_latency_sec, so one client can be
+        shared by concurrent callers.
+        """
+        ok = [safe_text_ok(st) for st in subtask_prompts]
+        runnable = [st for st, good in zip(subtask_prompts, ok) if good]
+
+        if self.mock_mode:
+            solved: List[Optional[GenerateResult]] = []
+            for st in runnable:
+                start = time.perf_counter()
+                out = self.solve_subtask(st)
+                solved.append(GenerateResult(out, estimate_tokens(out), max(0.0, time.perf_counter() - start)))
+        else:
+            solved = self.generate_batch_results(
+                [_solve_instruction(st) for st in runnable], max_tokens=max_tokens, temperature=temperature
+            )
+
+        it = iter(solved)
+        return [next(it) if good else None for good in ok]
+
+
+def _solve_instruction(subtask_prompt: str) -> str:
+    return (
+        "Safely and concisely complete the following benign subtask. "
+        "Avoid any sensitive, harmful, or dangerous content. "
+        "Focus on generic, constructive guidance.\n"
+        f"SUBTASK: {subtask_prompt}"
+    )
+
+
+class BatchedModelClient:
+    """Dynamic micro-batcher in front of ModelClient.generate_batch().
+
+    Concurrent agenerate() calls are queued; a background task takes up to
+    max_batch_size of them (waiting at most max_latency_ms after the first)
+    and sends each group sharing max_tokens/temperature to the wrapped client
+    as one batch. Intended for use within one event loop; call aclose() when done.
+    """
+
+    def __init__(self, client: ModelClient, max_batch_size: int = 8, max_latency_ms: float = 5.0) -> None:
+        self.client = client
+        self.name = client.name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_latency_ms = max(0.0, max_latency_ms)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def agenerate(self, prompt: str, max_tokens: int = 256, temperature: float = 0.7) -> str:
+        """Async generate(); raises UnsafeOutputError if the output fails the safety check."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._drain())
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, max_tokens, temperature, fut))
+        out = await fut
+        if out is None:
+            raise UnsafeOutputError("Model output failed safety check")
+        return out
+
+    async def _next_batch(self) -> list:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_latency_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            try:
+                if timeout <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _drain(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            # Only prompts with the same generation params can share a backend call
+            groups: Dict[Tuple[int, float], list] = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            for (max_tokens, temperature), items in groups.items():
+                try:
+                    outs = await asyncio.to_thread(
+                        self.client.generate_batch, [it[0] for it in items], max_tokens, temperature
+                    )
+                except Exception as e:
+                    for it in items:
+                        if not it[3].done():
+                            it[3].set_exception(e)
+                    continue
+                for it, out in zip(items, outs):
+                    if not it[3].done():
+                        it[3].set_result(out)
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+            self._queue = None
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from .clients import ModelClient, UnsafeOutputError, estimate_tokens
-from .filters import safe_text_ok, is_safe_text, SafeContentError
+from .clients import ModelClient, estimate_tokens
+from .filters import VerifiedText, safe_text_ok
 
 
-def safe_aggregator(solutions: List[str]) -> Tuple[str, bool]:
+def safe_aggregator(solutions: List[str], solutions_already_safe: bool = False) -> Tuple[str, bool]:
     """Combine solutions into a final answer, enforcing safety.
 
     Returns (final_answer, success). If any combined text is unsafe,
     returns a redacted placeholder and success=False.
+
+    Pass solutions_already_safe=True when every solution has passed the safety
+    filter: no blocklist term or pattern can span the blank-line separator, so
+    the joined text is then safe too and is not re-scanned.
     """
     text = "\n\n".join(solutions)
-    if not safe_text_ok(text):
+    if not solutions_already_safe and not safe_text_ok(text):
         return "[REDACTED for safety]", False
     # Keep the aggregation minimal and safe
     return text, True
@@ -27,15 +31,22 @@ def automated_decompose(task_prompt: str, weak_model: ModelClient, strong_model:
       {
         'subtasks': [...],
         'solutions': [...],
+        'final_answer': str,
         'success': bool,
         'logs': {...},
       }
     """
+    # Bound once as locals; logs holds the same list objects
+    blocked_subtasks: List[str] = []
+    subtask_tokens: List[int] = []
+    solution_tokens: List[int] = []
+    weak_latencies: List[float] = []
+    strong_latencies: List[float] = []
     logs: Dict[str, object] = {
-        "blocked_subtasks": [],
-        "subtask_token_estimates": [],
-        "solution_token_estimates": [],
-        "latency_sec": {"weak": [], "strong": []},
+        "blocked_subtasks": blocked_subtasks,
+        "subtask_token_estimates": subtask_tokens,
+        "solution_token_estimates": solution_tokens,
+        "latency_sec": {"weak": weak_latencies, "strong": strong_latencies},
     }
 
     # Check task safety
@@ -44,45 +55,53 @@ def automated_decompose(task_prompt: str, weak_model: ModelClient, strong_model:
         return {
             "subtasks": [],
             "solutions": [],
+            "final_answer": "",
             "success": False,
             "logs": logs,
         }
 
     # Propose subtasks
-    subtasks = weak_model.propose_subtasks(task_prompt, max_items=6)
-    logs["latency_sec"]["weak"].append(getattr(weak_model, "last_latency_sec", 0.0))
+    # Per-call telemetry rather than last_latency_sec: clients may be shared across threads
+    subtasks, weak_latency = weak_model.propose_subtasks_timed(task_prompt, max_items=6)
+    weak_latencies.append(weak_latency)
 
     safe_subtasks: List[str] = []
     for st in subtasks:
         if not safe_text_ok(st):
-            logs["blocked_subtasks"].append(st)
+            blocked_subtasks.append(st)
             continue
         safe_subtasks.append(st)
-        logs["subtask_token_estimates"].append(estimate_tokens(st))
+        subtask_tokens.append(estimate_tokens(st))
+
+    # One batched strong-model call for all subtasks instead of one call per subtask;
+    # None marks a subtask whose prompt or output failed the safety check
+    outs: List[Optional[str]] = []
+    if safe_subtasks:
+        for res in strong_model.solve_subtasks_batch_results(safe_subtasks):
+            outs.append(None if res is None else res.text)
+            strong_latencies.append(0.0 if res is None else res.latency_sec)
 
+    # generate() already checks output safety and tags it VerifiedText; anything else
+    # (e.g. mock or custom clients) gets a redundant check for defense-in-depth
     solutions: List[str] = []
-    for st in safe_subtasks:
-        try:
-            out = strong_model.solve_subtask(st)
-            # generate() already checks output safety; redundant check added for defense-in-depth
-            if not is_safe_text(out):
-                logs.setdefault("redacted", True)
-                solutions.append("[REDACTED for safety]")
-            else:
-                solutions.append(out)
-        except (UnsafeOutputError, SafeContentError):
-            logs.setdefault("redacted", True)
-            solutions.append("[REDACTED for safety]")
-        finally:
-            logs["latency_sec"]["strong"].append(getattr(strong_model, "last_latency_sec", 0.0))
-            logs["solution_token_estimates"].append(estimate_tokens(solutions[-1]))
-
-    final_answer, ok = safe_aggregator(solutions)
+    redacted = False
+    for out in outs:
+        if out is None or not (isinstance(out, VerifiedText) or safe_text_ok(out)):
+            out = "[REDACTED for safety]"
+            redacted = True
+        solutions.append(out)
+        solution_tokens.append(estimate_tokens(out))
+    if redacted:
+        logs["redacted"] = True
+
+    # Every entry was checked above (or is the redaction placeholder)
+    final_answer, ok = safe_aggregator(solutions, solutions_already_safe=True)
     logs["final_answer_preview_chars"] = final_answer[:120]
 
     return {
         "subtasks": safe_subtasks,
         "solutions": solutions,
+        "final_answer": final_answer,
         "success": bool(ok and len(safe_subtasks) == len(solutions) and len(solutions) > 0),
         "logs": logs,
     }
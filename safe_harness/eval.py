@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import csv
+import functools
 import random
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import pandas as pd
-import matplotlib.pyplot as plt
+try:
+    import ahocorasick
+except Exception:  # pragma: no cover
+    ahocorasick = None  # type: ignore
 
-from .clients import ModelClient, estimate_tokens
+from .clients import BatchedModelClient, ModelClient, estimate_tokens
 from .decompose import automated_decompose
-from .filters import is_safe_text
+from .filters import flush_safety_log, is_safe_text
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+
+# Columns of eval_results.csv / results_df, in row-dict order
+RESULT_FIELDS = ["variant", "prompt", "output", "accuracy", "success", "tokens"]
 
 
 @dataclass
@@ -19,35 +32,55 @@ class ProxyTask:
     expected_keywords: List[str]
 
 
+@functools.lru_cache(maxsize=256)
+def _keyword_automaton(keywords: Tuple[str, ...]):
+    # Built once per distinct (lowercased) keyword list, i.e. once per task
+    automaton = ahocorasick.Automaton()
+    for k in set(keywords):
+        if k:
+            automaton.add_word(k, k)
+    automaton.make_automaton()
+    return automaton
+
+
 def _accuracy_from_keywords(text: str, expected_keywords: List[str]) -> float:
     """Simple proxy accuracy: fraction of expected keywords present (case-insensitive).
 
-    If no keywords are provided, returns 1.0.
+    If no keywords are provided, returns 1.0. With pyahocorasick installed, all
+    keywords are found in one pass over the text.
     """
     if not expected_keywords:
         return 1.0
     t = text.lower() if text else ""
-    hits = sum(1 for k in expected_keywords if k.lower() in t)
+    kws = tuple(k.lower() for k in expected_keywords)
+    if ahocorasick is not None and t and any(kws):
+        found = {k for _, k in _keyword_automaton(kws).iter(t)}
+        hits = sum(1 for k in kws if not k or k in found)
+    else:
+        hits = sum(1 for k in kws if k in t)
     return hits / max(1, len(expected_keywords))
 
 
-def evaluate_single_model(task: ProxyTask, model: ModelClient) -> Dict[str, object]:
-    # Skip/flag unsafe prompts
-    if not is_safe_text(task.prompt):
-        return {
-            "variant": "single_model",
-            "prompt": "[BLOCKED]",
-            "output": "",
-            "accuracy": 0.0,
-            "success": False,
-            "tokens": 0,
-        }
+def _blocked_row(variant: str) -> Dict[str, object]:
+    return {
+        "variant": variant,
+        "prompt": "[BLOCKED]",
+        "output": "",
+        "accuracy": 0.0,
+        "success": False,
+        "tokens": 0,
+    }
+
+
+def _single_instruction(task: ProxyTask) -> str:
     # Simple safe instruction wrapper
-    instr = (
+    return (
         "Provide a brief, safe response. Avoid any sensitive or harmful content.\n"
         f"TASK: {task.prompt}"
     )
-    out = model.generate(instr, max_tokens=256, temperature=0.2)
+
+
+def _single_row(task: ProxyTask, out: str, tokens: int) -> Dict[str, object]:
     acc = _accuracy_from_keywords(out, task.expected_keywords)
     return {
         "variant": "single_model",
@@ -55,28 +88,41 @@ def evaluate_single_model(task: ProxyTask, model: ModelClient) -> Dict[str, obje
         "output": out,
         "accuracy": acc,
         "success": acc >= 1.0,  # exact proxy success criterion
-        "tokens": model.last_tokens_used,
+        "tokens": tokens,
     }
 
 
+def evaluate_single_model(task: ProxyTask, model: ModelClient) -> Dict[str, object]:
+    # Skip/flag unsafe prompts
+    if not is_safe_text(task.prompt):
+        return _blocked_row("single_model")
+    res = model.generate_result(_single_instruction(task), max_tokens=256, temperature=0.2)
+    return _single_row(task, res.text, res.tokens)
+
+
+async def aevaluate_single_model(task: ProxyTask, model: BatchedModelClient) -> Dict[str, object]:
+    """Async evaluate_single_model(); concurrent calls are coalesced by the batching client."""
+    if not is_safe_text(task.prompt):
+        return _blocked_row("single_model")
+    out = await model.agenerate(_single_instruction(task), max_tokens=256, temperature=0.2)
+    return _single_row(task, out, estimate_tokens(out))
+
+
 def evaluate_composed_model(task: ProxyTask, weak: ModelClient, strong: ModelClient) -> Dict[str, object]:
     if not is_safe_text(task.prompt):
-        return {
-            "variant": "composed_model",
-            "prompt": "[BLOCKED]",
-            "output": "",
-            "accuracy": 0.0,
-            "success": False,
-            "tokens": 0,
-        }
+        return _blocked_row("composed_model")
 
     res = automated_decompose(task.prompt, weak, strong)
-    combined = "\n\n".join(res["solutions"]) if res.get("solutions") else ""
+    # automated_decompose already joined the solutions (no redaction: they were all checked)
+    combined = res.get("final_answer", "")
     acc = _accuracy_from_keywords(combined, task.expected_keywords)
 
-    # Token usage proxy: sum estimated tokens of solutions; include subtasks cost lightly
-    token_usage = sum(estimate_tokens(s) for s in res.get("solutions", []))
-    token_usage += sum(int(0.5 * estimate_tokens(st)) for st in res.get("subtasks", []))
+    # Token usage proxy: sum estimated tokens of solutions; include subtasks cost lightly.
+    # automated_decompose already estimated both, one entry per solution/subtask.
+    logs = res.get("logs", {})
+    token_usage = sum(logs.get("solution_token_estimates", []))
+    for n in logs.get("subtask_token_estimates", []):
+        token_usage += int(0.5 * n)
 
     return {
         "variant": "composed_model",
@@ -88,6 +134,132 @@ def evaluate_composed_model(task: ProxyTask, weak: ModelClient, strong: ModelCli
     }
 
 
+def _run_one(
+    item: Tuple[ProxyTask, str],
+    single_model: ModelClient,
+    weak_model: ModelClient,
+    strong_model: ModelClient,
+) -> Dict[str, object]:
+    task, variant = item
+    if variant == "single_model":
+        return evaluate_single_model(task, single_model)
+    return evaluate_composed_model(task, weak_model, strong_model)
+
+
+def _accumulate(totals: Dict[str, List[float]], row: Dict[str, object]) -> None:
+    # Running [accuracy, success, tokens, count] sums per variant
+    t = totals.setdefault(str(row["variant"]), [0.0, 0.0, 0.0, 0])
+    t[0] += float(row["accuracy"])  # type: ignore[arg-type]
+    t[1] += float(row["success"])  # type: ignore[arg-type]
+    t[2] += float(row["tokens"])  # type: ignore[arg-type]
+    t[3] += 1
+
+
+def _summary_frame(totals: Dict[str, List[float]]) -> "pd.DataFrame":
+    # Same shape as the former groupby("variant").agg(...): one row per variant, sorted
+    import pandas as pd
+
+    variants = sorted(totals)
+    return pd.DataFrame({
+        "variant": variants,
+        "accuracy": [totals[v][0] / totals[v][3] for v in variants],
+        "success_rate": [totals[v][1] / totals[v][3] for v in variants],
+        "mean_token_usage": [totals[v][2] / totals[v][3] for v in variants],
+        "count": [int(totals[v][3]) for v in variants],
+    })
+
+
+async def aevaluate_composed_model(
+    task: ProxyTask,
+    weak: ModelClient,
+    strong: ModelClient,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> Dict[str, object]:
+    """Async evaluate_composed_model(); runs in a worker thread so it overlaps other evaluations.
+
+    The weak/strong calls are plain blocking calls on the shared clients, not
+    coalesced by a BatchedModelClient. Pass limit to bound how many threads run at once.
+    """
+    if limit is None:
+        return await asyncio.to_thread(evaluate_composed_model, task, weak, strong)
+    async with limit:
+        return await asyncio.to_thread(evaluate_composed_model, task, weak, strong)
+
+
+async def _aevaluate_all(
+    order: List[ProxyTask],
+    single_model: BatchedModelClient,
+    weak_model: ModelClient,
+    strong_model: ModelClient,
+    workers: int = 1,
+) -> List[Dict[str, object]]:
+    limit = asyncio.Semaphore(max(1, workers))
+    try:
+        # gather() keeps submission order, so rows match the sequential loop
+        rows = await asyncio.gather(*(
+            coro
+            for t in order
+            for coro in (
+                aevaluate_single_model(t, single_model),
+                aevaluate_composed_model(t, weak_model, strong_model, limit),
+            )
+        ))
+    finally:
+        await single_model.aclose()
+    return list(rows)
+
+
+def _plot_success_rate(summary: "pd.DataFrame", plot_path: Path) -> None:
+    import matplotlib.pyplot as plt
+
+    # Plot success rate comparison
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.bar(summary["variant"], summary["success_rate"], color=["#4B8BF4", "#34C759"])  # type: ignore
+    ax.set_ylim(0, 1)
+    ax.set_ylabel("Success Rate")
+    ax.set_title("Success Rate by Variant")
+    for i, v in enumerate(summary["success_rate"]):
+        ax.text(i, v + 0.02, f"{v:.2f}", ha="center")
+    fig.tight_layout()
+    fig.savefig(plot_path)
+    plt.close(fig)
+
+
+def _loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _iter_rows(
+    order: List[ProxyTask],
+    single_model: ModelClient,
+    weak_model: ModelClient,
+    strong_model: ModelClient,
+    max_batch_size: int,
+    max_latency_ms: float,
+    workers: int,
+) -> Iterator[Dict[str, object]]:
+    if max_batch_size > 1:
+        batched = BatchedModelClient(single_model, max_batch_size=max_batch_size, max_latency_ms=max_latency_ms)
+        yield from asyncio.run(_aevaluate_all(order, batched, weak_model, strong_model, workers))
+    elif workers > 1:
+        # Evaluations share only the clients and filters; they use per-call telemetry
+        # (generate_result and friends), never the clients' last_* attributes
+        items = [(t, v) for t in order for v in ("single_model", "composed_model")]
+        run_one = functools.partial(
+            _run_one, single_model=single_model, weak_model=weak_model, strong_model=strong_model
+        )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(run_one, items)
+    else:
+        for t in order:
+            yield evaluate_single_model(t, single_model)
+            yield evaluate_composed_model(t, weak_model, strong_model)
+
+
 def run_evaluation(
     tasks: Iterable[ProxyTask],
     single_model: ModelClient,
@@ -96,52 +268,74 @@ def run_evaluation(
     trials: int = 3,
     seed: int = 42,
     out_dir: Path | None = None,
+    max_batch_size: int = 1,
+    max_latency_ms: float = 5.0,
+    make_plots: bool = True,
+    workers: int = 1,
+    keep_rows: bool = True,
 ) -> Dict[str, object]:
+    """Evaluate single vs composed variants over shuffled trials and save artifacts.
+
+    With max_batch_size > 1, all evaluations run concurrently and single-model
+    generate calls are coalesced into batches of up to max_batch_size (waiting
+    at most max_latency_ms to fill one); composed evaluations are not batched
+    and run on at most workers threads. This mode drives its own event loop, so
+    it cannot be called from a running one (use asyncio.to_thread(run_evaluation, ...)
+    there). Otherwise, workers > 1 runs the
+    trials x tasks x variants evaluations on a thread pool. Row order is the same
+    in every mode. make_plots=False skips the success-rate plot (and importing
+    matplotlib); its artifact path is then None.
+
+    Rows are streamed to eval_results.csv as they are produced and summarized
+    incrementally; with keep_rows=False they are not held in memory and
+    results_df is None.
+    """
+    import pandas as pd
+
+    if max_batch_size > 1 and _loop_running():
+        raise RuntimeError(
+            "run_evaluation(max_batch_size > 1) cannot run inside a running event loop; "
+            "call it via asyncio.to_thread(run_evaluation, ...) or use max_batch_size=1"
+        )
+
     rng = random.Random(seed)
     tasks_list = list(tasks)
 
-    all_rows: List[Dict[str, object]] = []
-
+    order: List[ProxyTask] = []
     for _ in range(trials):
         rng.shuffle(tasks_list)
-        for t in tasks_list:
-            single = evaluate_single_model(t, single_model)
-            comp = evaluate_composed_model(t, weak_model, strong_model)
-            all_rows.extend([single, comp])
-
-    df = pd.DataFrame(all_rows)
-
-    # Aggregate summary metrics by variant
-    summary = df.groupby("variant").agg(
-        accuracy=("accuracy", "mean"),
-        success_rate=("success", "mean"),
-        mean_token_usage=("tokens", "mean"),
-        count=("prompt", "count"),
-    ).reset_index()
+        order.extend(tasks_list)
 
     # Save artifacts
     if out_dir is None:
         out_dir = Path("logs")
     out_dir.mkdir(parents=True, exist_ok=True)
-
     csv_path = out_dir / "eval_results.csv"
-    df.to_csv(csv_path, index=False)
+
+    all_rows: Optional[List[Dict[str, object]]] = [] if keep_rows else None
+    # Aggregate summary metrics by variant in the same pass (no groupby)
+    totals: Dict[str, List[float]] = {}
+    with csv_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for row in _iter_rows(order, single_model, weak_model, strong_model, max_batch_size, max_latency_ms, workers):
+            writer.writerow(row)
+            _accumulate(totals, row)
+            if all_rows is not None:
+                all_rows.append(row)
+
+    df = pd.DataFrame(all_rows, columns=RESULT_FIELDS) if all_rows is not None else None
+    summary = _summary_frame(totals)
 
     summary_path = out_dir / "eval_summary.csv"
     summary.to_csv(summary_path, index=False)
 
-    # Plot success rate comparison
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.bar(summary["variant"], summary["success_rate"], color=["#4B8BF4", "#34C759"])  # type: ignore
-    ax.set_ylim(0, 1)
-    ax.set_ylabel("Success Rate")
-    ax.set_title("Success Rate by Variant")
-    for i, v in enumerate(summary["success_rate"]):
-        ax.text(i, v + 0.02, f"{v:.2f}", ha="center")
-    plot_path = out_dir / "eval_success_rate.png"
-    fig.tight_layout()
-    fig.savefig(plot_path)
-    plt.close(fig)
+    plot_path = out_dir / "eval_success_rate.png" if make_plots else None
+    if plot_path is not None:
+        _plot_success_rate(summary, plot_path)
+
+    # Blocks are logged from a background thread; make them visible to the caller
+    flush_safety_log()
 
     return {
         "results_df": df,
@@ -149,7 +343,7 @@ def run_evaluation(
         "artifacts": {
             "results_csv": str(csv_path),
             "summary_csv": str(summary_path),
-            "success_plot": str(plot_path),
+            "success_plot": str(plot_path) if plot_path else None,
         },
     }
 
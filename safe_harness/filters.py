@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import atexit
+import functools
+import hashlib
 import json
+import os
+import queue
 import re
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    import re2  # google-re2 / pyre2
+except Exception:  # pragma: no cover
+    re2 = None  # type: ignore
 
 
 class SafeContentError(ValueError):
@@ -16,6 +34,16 @@ class SafeContentError(ValueError):
         self.reasons = reasons or []
 
 
+class VerifiedText(str):
+    """A str that already passed is_safe_text with the default config.
+
+    ModelClient tags its checked outputs with this so callers can skip a second
+    scan. Derived strings (slices, joins) are plain str again and get re-checked.
+    """
+
+    __slots__ = ()
+
+
 @dataclass
 class SafetyConfig:
     blocklist: List[str] = field(default_factory=lambda: [
@@ -43,19 +71,184 @@ class SafetyConfig:
     # Path to JSONL safety log file
     log_path: Path = Path("logs/safety_events.jsonl")
 
+    def __post_init__(self) -> None:
+        # Compile once per config: one alternation over all (lowercased) blocklist terms,
+        # plus each valid pattern. Both run on text.lower(), as the original per-term checks
+        # did: re.IGNORECASE on the raw text folds differently outside ASCII (e.g. "İ"
+        # lowercases to two characters, which moves \b). Edit blocklist/patterns by
+        # constructing a new config, not by mutating these lists.
+        terms = sorted({t.lower() for t in self.blocklist if t})
+        self._blocklist_re = re.compile("|".join(map(re.escape, terms))) if terms else None
+        # (term, lowercased term) in config order, to name the hits on a fused-regex hit
+        self._terms_lower: List[Tuple[str, str]] = [(t, t.lower()) for t in self.blocklist if t]
+        self._patterns_re: List[Tuple[str, re.Pattern]] = []
+        for pat in self.patterns:
+            try:
+                self._patterns_re.append((pat, re.compile(pat)))
+            except re.error:
+                continue
+        # With RE2 installed, one linear-time automaton over all terms and patterns decides
+        # most (safe) texts in a single pass. Only a prefilter, and only trusted to clear
+        # ASCII text against ASCII terms/patterns: there its matches are a superset of re's
+        # (outside ASCII, RE2 (?i) differs, e.g. it does not fold "İ" to "i" and its \b is
+        # ASCII-only). Hits, and all non-ASCII text, go through the re matchers.
+        self._prefilter = None
+        ascii_rules = all(t.isascii() for t in terms) and all(pat.isascii() for pat, _ in self._patterns_re)
+        if re2 is not None and ascii_rules and (terms or self._patterns_re):
+            alts = [*map(re.escape, terms), *(f"(?:{pat})" for pat, _ in self._patterns_re)]
+            try:
+                if hasattr(re2, "Options"):  # google-re2: don't log rejected patterns to stderr
+                    opts = re2.Options()
+                    opts.log_errors = False
+                    self._prefilter = re2.compile("(?i)" + "|".join(alts), options=opts)
+                else:
+                    self._prefilter = re2.compile("(?i)" + "|".join(alts))
+            except Exception:
+                # Pattern syntax RE2 does not support (e.g. backreferences)
+                self._prefilter = None
+        # Scan results keyed by blake2b of the text; see _scan_reasons
+        self._verdicts: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
+        self._verdicts_lock = threading.Lock()
+
+
+# Max cached scan results per SafetyConfig
+_VERDICT_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=1)
+def _default_config() -> SafetyConfig:
+    return SafetyConfig()
+
+
+def _iso_from_ns(ns: int) -> str:
+    # Same format as datetime.now(timezone.utc).isoformat(), for a time.time_ns() stamp
+    sec, rem = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(sec, timezone.utc).replace(microsecond=rem // 1000).isoformat()
+
+
+class _SafetyLogWriter:
+    """Appends safety events from a daemon thread so checks never wait on file I/O.
+
+    Events are queued as (path, dict); the thread serializes whatever has queued up
+    and appends it with one unbuffered write per path, so nothing sits in a user-space
+    buffer (a forked child cannot re-emit it). flush() waits for queued events to land;
+    drained on interpreter exit.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    def _reset(self) -> None:
+        self._queue: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._files: Dict[Path, BinaryIO] = {}
+        self._atexit_registered = getattr(self, "_atexit_registered", False)
+
+    def _after_fork_in_child(self) -> None:
+        # The writer thread does not survive fork and the parent still owns (and will
+        # write) whatever was queued; start the child with an empty queue. Dropping the
+        # unbuffered handles loses nothing.
+        self._reset()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="safety-log-writer", daemon=True)
+                    self._thread.start()
+                    if not self._atexit_registered:
+                        atexit.register(self.close)
+                        self._atexit_registered = True
+
+    def submit(self, path: Path, event: dict) -> None:
+        self._ensure_thread()
+        self._queue.put((path, event))
+
+    def flush(self) -> None:
+        """Block until every event submitted so far is written."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    @staticmethod
+    def _encode(event: dict) -> bytes:
+        # Events are stamped with time.time_ns(); format off the checking thread
+        if isinstance(event.get("timestamp"), int):
+            event["timestamp"] = _iso_from_ns(event["timestamp"])
+        if orjson is not None:
+            return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        return json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def _write(self, pending: Dict[Path, List[bytes]]) -> None:
+        for path, lines in pending.items():
+            try:
+                fh = self._files.get(path)
+                if fh is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    fh = self._files[path] = path.open("ab", buffering=0)
+                fh.write(b"".join(lines))
+            except Exception:
+                # Logging must not crash the app
+                pass
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            # Write everything already queued in one go; None means close(),
+            # an Event is a flush() waiting for the events queued before it
+            pending: Dict[Path, List[bytes]] = {}
+            waiters: List[threading.Event] = []
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    path, event = item  # type: ignore[misc]
+                    try:
+                        pending.setdefault(path, []).append(self._encode(event))
+                    except Exception:
+                        pass
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(pending)
+            for done in waiters:
+                done.set()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join()
+        for fh in self._files.values():
+            try:
+                fh.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+
+_SAFETY_LOG = _SafetyLogWriter()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_SAFETY_LOG._after_fork_in_child)
+
+
+def flush_safety_log() -> None:
+    """Wait until all safety events logged so far are on disk."""
+    _SAFETY_LOG.flush()
 
 
 def _log_safety_event(config: SafetyConfig, event: dict) -> None:
-    try:
-        config.log_path.parent.mkdir(parents=True, exist_ok=True)
-        with config.log_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
-    except Exception:
-        # Logging must not crash the app
-        pass
+    _SAFETY_LOG.submit(config.log_path, event)
 
 
 def _classifier_placeholder(text: str) -> dict:
@@ -68,6 +261,94 @@ def _classifier_placeholder(text: str) -> dict:
     return {"label": "safe", "category": "benign"}
 
 
+def _verdict_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _cached_verdict(config: SafetyConfig, key: bytes) -> Optional[Tuple[str, ...]]:
+    with config._verdicts_lock:
+        hit = config._verdicts.get(key)
+        if hit is not None:
+            config._verdicts.move_to_end(key)
+        return hit
+
+
+def _cache_verdict(config: SafetyConfig, key: bytes, verdict: Tuple[str, ...]) -> None:
+    with config._verdicts_lock:
+        config._verdicts[key] = verdict
+        if len(config._verdicts) > _VERDICT_CACHE_SIZE:
+            config._verdicts.popitem(last=False)
+
+
+def _scan_reasons(text: str, config: SafetyConfig) -> Tuple[str, ...]:
+    """Blocklist/pattern reasons for text; empty if it passes.
+
+    Prompts and mock outputs repeat across trials, so results are cached per config
+    (LRU) by content hash and a repeat costs one hash instead of a full scan.
+    """
+    key = _verdict_key(text)
+    hit = _cached_verdict(config, key)
+    if hit is not None:
+        return hit
+
+    reasons: List[str] = []
+    if config._prefilter is not None and text.isascii() and not config._prefilter.search(text):
+        _cache_verdict(config, key, ())
+        return ()
+
+    t = text.lower()
+
+    # Blocklist terms: one scan of the fused regex; only on a hit, list each matching term
+    if config._blocklist_re is not None and config._blocklist_re.search(t):
+        reasons.extend(f"blocklist:{term}" for term, low in config._terms_lower if low in t)
+
+    # Regex patterns
+    for pat, rx in config._patterns_re:
+        if rx.search(t):
+            reasons.append(f"pattern:{pat}")
+
+    verdict = tuple(reasons)
+    _cache_verdict(config, key, verdict)
+    return verdict
+
+
+def is_safe_text_fast(text: str, *, config: Optional[SafetyConfig] = None) -> bool:
+    """Same verdict as is_safe_text, as a bool, stopping at the first hit.
+
+    Collects no reasons and writes no safety log; use is_safe_text (or safe_text_ok)
+    where blocks must be recorded. Matching is on text.lower(), so non-ASCII case
+    forms behave as they always have:
+
+    >>> is_safe_text_fast("İcrack password.")
+    False
+    >>> is_safe_text_fast("İmanufacturing drugs- -")
+    False
+    """
+    if config is None:
+        config = _default_config()
+
+    if not text:
+        return True
+
+    key = _verdict_key(text)
+    hit = _cached_verdict(config, key)
+    if hit is not None:
+        # A cached () only covers the blocklist/patterns; the classifier still decides
+        return not hit and _classifier_placeholder(text).get("label") in {"safe", "benign"}
+
+    if config._prefilter is None or not text.isascii() or config._prefilter.search(text):
+        t = text.lower()
+        if config._blocklist_re is not None and config._blocklist_re.search(t):
+            return False
+        for _, rx in config._patterns_re:
+            if rx.search(t):
+                return False
+
+    # Only a pass is cached here; a block is left for is_safe_text to cache with its reasons
+    _cache_verdict(config, key, ())
+    return _classifier_placeholder(text).get("label") in {"safe", "benign"}
+
+
 def is_safe_text(text: str, *, config: Optional[SafetyConfig] = None, context: str = "") -> bool:
     """Check text against safety policy.
 
@@ -78,26 +359,12 @@ def is_safe_text(text: str, *, config: Optional[SafetyConfig] = None, context: s
     - Returns True if safe; otherwise raises SafeContentError. Does not sanitize.
     """
     if config is None:
-        config = SafetyConfig()
+        config = _default_config()
 
     if not text:
         return True
 
-    t = text.lower()
-    reasons: List[str] = []
-
-    # Blocklist terms
-    for term in config.blocklist:
-        if term and term.lower() in t:
-            reasons.append(f"blocklist:{term}")
-
-    # Regex patterns
-    for pat in config.patterns:
-        try:
-            if re.search(pat, t):
-                reasons.append(f"pattern:{pat}")
-        except re.error:
-            continue
+    reasons: List[str] = list(_scan_reasons(text, config))
 
     # Placeholder classifier: only used if no hard triggers
     if not reasons:
@@ -109,7 +376,7 @@ def is_safe_text(text: str, *, config: Optional[SafetyConfig] = None, context: s
         _log_safety_event(
             config,
             {
-                "timestamp": _now_iso(),
+                "timestamp": time.time_ns(),
                 "context": context,
                 "reason": reasons,
                 "text_preview": text[:120],
@@ -121,7 +388,13 @@ def is_safe_text(text: str, *, config: Optional[SafetyConfig] = None, context: s
 
 
 def safe_text_ok(text: str, *, config: Optional[SafetyConfig] = None) -> bool:
-    """Boolean convenience wrapper; returns False instead of raising."""
+    """Boolean convenience wrapper; returns False instead of raising.
+
+    Safe text takes the early-exit is_safe_text_fast path; blocked text is
+    re-checked with is_safe_text so the block is still logged with its reasons.
+    """
+    if is_safe_text_fast(text, config=config):
+        return True
     try:
         is_safe_text(text, config=config)
         return True
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
+import functools
+import itertools
+import os
 import uuid
 from dataclasses import dataclass, field
 from typing import Callable, List, Optional
 
 from .clients import ModelAClient, ModelBClient, ModelClientProtocol, estimate_tokens
-from .filters import safe_text_ok, is_safe_text, SafeContentError
+from .filters import safe_text_ok, is_safe_text, SafeContentError, VerifiedText
 from .run_logger import JsonlLogger, RunLog, SubtaskLog
 
 
+# Run ids: one random UUID per process plus a counter, instead of uuid4() per run
+_PROCESS_UUID = str(uuid.uuid4())
+_RUN_SEQ = itertools.count()
+
+
+def _reseed_run_ids() -> None:
+    # Forked workers would otherwise inherit the parent's UUID and counter and reuse ids
+    global _PROCESS_UUID, _RUN_SEQ
+    _PROCESS_UUID = str(uuid.uuid4())
+    _RUN_SEQ = itertools.count()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_run_ids)
+
+
 @dataclass
 class Pipeline:
     task_name: str
@@ -42,15 +61,26 @@ def automated_decompose(p: Pipeline) -> List[str]:
     return subtasks
 
 
+def _default_logger() -> JsonlLogger:
+    # Resolved per call, so a later chdir logs under the new working directory
+    return _logger_for(Path("logs/experiment_runs.jsonl").absolute())
+
+
+@functools.lru_cache(maxsize=8)
+def _logger_for(log_path: Path) -> JsonlLogger:
+    # One logger (mkdir + open) per log file rather than per run
+    return JsonlLogger(log_path=log_path)
+
+
 def run_pipeline(
     p: Pipeline,
     strategy: str = "automated",
     logger: Optional[JsonlLogger] = None,
 ) -> RunLog:
     if logger is None:
-        logger = JsonlLogger(log_path=Path("logs/experiment_runs.jsonl"))
+        logger = _default_logger()
 
-    run_id = str(uuid.uuid4())
+    run_id = f"{_PROCESS_UUID}-{next(_RUN_SEQ)}"
 
     if not safe_text_ok(p.prompt):
         # Don't execute unsafe prompts
@@ -80,23 +110,40 @@ def run_pipeline(
     subtask_logs: List[SubtaskLog] = []
 
     # Execute subtasks with Model A
+    runnable: List[str] = []
     for s in subtasks:
         if not safe_text_ok(s):
             blocked_subtasks.append(s)
             continue
-        prompt_tokens = estimate_tokens(s)
+        runnable.append(s)
+
+    # Single batched call when the client supports it: one entry per subtask, None where
+    # that subtask's call failed the safety check. Otherwise one call per subtask.
+    call_batch = getattr(p.model_a, "call_batch", None)
+    outputs: List[Optional[str]] = []
+    if runnable and call_batch is not None:
+        outputs = list(call_batch(runnable))
+    else:
+        for s in runnable:
+            try:
+                outputs.append(p.model_a.call(s))
+            except SafeContentError:
+                outputs.append(None)
+
+    for s, raw_out in zip(runnable, outputs):
         try:
-            raw_out = p.model_a.call(s)
-            # Enforce safety for non-ModelClient outputs
-            is_safe_text(raw_out, context="pipeline:model_a_output")
-            completion_tokens = estimate_tokens(raw_out)
+            if raw_out is None:
+                raise SafeContentError("Model A call failed safety check")
+            # Enforce safety for non-ModelClient outputs; VerifiedText was already checked
+            if not isinstance(raw_out, VerifiedText):
+                is_safe_text(raw_out, context="pipeline:model_a_output")
             subtask_logs.append(
                 SubtaskLog(
                     subtask=s,
                     output=raw_out,
                     redacted=False,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
+                    prompt_tokens=estimate_tokens(s),
+                    completion_tokens=estimate_tokens(raw_out),
                 )
             )
         except SafeContentError:
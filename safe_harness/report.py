@@ -5,10 +5,12 @@ import shutil
 import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
-import matplotlib.pyplot as plt
-import pandas as pd
+from .filters import flush_safety_log
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
 
 
 def _now_iso() -> str:
@@ -29,40 +31,35 @@ def _df_to_markdown(df: pd.DataFrame, max_rows: int = 50) -> str:
     lines = ["| " + " | ".join(map(str, cols)) + " |"]
     lines.append("| " + " | ".join(["---"] * len(cols)) + " |")
     # Rows
-    for _, row in df_disp.iterrows():
-        vals = [str(row[c]) for c in cols]
-        lines.append("| " + " | ".join(vals) + " |")
+    for row in df_disp.itertuples(index=False, name=None):
+        lines.append("| " + " | ".join(map(str, row)) + " |")
     if len(df) > max_rows:
         lines.append(f"\n> Note: showing first {max_rows} of {len(df)} rows.")
     return "\n".join(lines)
 
 
-def _plot_success_rate(summary_df: pd.DataFrame, out_path: Path) -> Path:
-    fig, ax = plt.subplots(figsize=(6, 4))
+def _plot_summary(summary_df: pd.DataFrame, out_path: Path) -> Path:
+    """Success rate and mean token usage by variant, side by side in one figure."""
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
     variants = summary_df["variant"].tolist()
+
     values = summary_df["success_rate"].tolist() if "success_rate" in summary_df else []
-    ax.bar(variants, values, color=["#4B8BF4", "#34C759"])  # type: ignore
-    ax.set_ylim(0, 1)
-    ax.set_ylabel("Success Rate")
-    ax.set_title("Success Rate by Variant")
+    ax1.bar(variants, values, color=["#4B8BF4", "#34C759"])  # type: ignore
+    ax1.set_ylim(0, 1)
+    ax1.set_ylabel("Success Rate")
+    ax1.set_title("Success Rate by Variant")
     for i, v in enumerate(values):
-        ax.text(i, min(0.98, v + 0.02), f"{v:.2f}", ha="center")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.tight_layout()
-    fig.savefig(out_path)
-    plt.close(fig)
-    return out_path
-
+        ax1.text(i, min(0.98, v + 0.02), f"{v:.2f}", ha="center")
 
-def _plot_mean_tokens(summary_df: pd.DataFrame, out_path: Path) -> Path:
-    fig, ax = plt.subplots(figsize=(6, 4))
-    variants = summary_df["variant"].tolist()
     values = summary_df["mean_token_usage"].tolist() if "mean_token_usage" in summary_df else []
-    ax.bar(variants, values, color=["#8E8E93", "#FF9F0A"])  # type: ignore
-    ax.set_ylabel("Mean Token Usage (proxy)")
-    ax.set_title("Mean Token Usage by Variant")
+    ax2.bar(variants, values, color=["#8E8E93", "#FF9F0A"])  # type: ignore
+    ax2.set_ylabel("Mean Token Usage (proxy)")
+    ax2.set_title("Mean Token Usage by Variant")
     for i, v in enumerate(values):
-        ax.text(i, v * 1.01 if v else 0.02, f"{v:.1f}", ha="center")
+        ax2.text(i, v * 1.01 if v else 0.02, f"{v:.1f}", ha="center")
+
     out_path.parent.mkdir(parents=True, exist_ok=True)
     fig.tight_layout()
     fig.savefig(out_path)
@@ -70,44 +67,59 @@ def _plot_mean_tokens(summary_df: pd.DataFrame, out_path: Path) -> Path:
     return out_path
 
 
-def generate_report(results_df: pd.DataFrame, config: Dict[str, object], output_path: Path | str) -> Dict[str, object]:
+def generate_report(
+    results_df: pd.DataFrame,
+    config: Dict[str, object],
+    output_path: Path | str,
+    make_plots: bool = True,
+    summary_df: Optional[pd.DataFrame] = None,
+) -> Dict[str, object]:
     """Generate a Markdown report and optional PDF, with attached artifacts.
 
     Parameters
     - results_df: pandas DataFrame from evaluation (rows per (task, variant))
     - config: dict with metadata, e.g., {"trials": int, "seed": int, "models": {...}}
     - output_path: directory where report.md and artifacts/ are written
+    - make_plots: when False, skip the plots (and importing matplotlib)
+    - summary_df: per-variant summary already computed by run_evaluation; derived
+      from results_df when omitted. results_df may then be None (keep_rows=False).
 
     Returns
     - dict with paths to report, pdf (if created), and artifacts folder
     """
+    import pandas as pd
+
     out_dir = Path(output_path)
     out_dir.mkdir(parents=True, exist_ok=True)
     artifacts = out_dir / "artifacts"
     artifacts.mkdir(parents=True, exist_ok=True)
 
-    # Derive summary
-    summary = (
-        results_df.groupby("variant").agg(
+    if results_df is None:
+        results_df = pd.DataFrame()
+
+    # Derive summary unless the caller already has it
+    if summary_df is not None:
+        summary = summary_df
+    elif not results_df.empty:
+        summary = results_df.groupby("variant").agg(
             accuracy=("accuracy", "mean"),
             success_rate=("success", "mean"),
             mean_token_usage=("tokens", "mean"),
             count=("prompt", "count"),
         ).reset_index()
-        if not results_df.empty
-        else pd.DataFrame()
-    )
+    else:
+        summary = pd.DataFrame()
 
     # Plots
-    success_plot = _plot_success_rate(summary, artifacts / "success_rate.png") if not summary.empty else None
-    tokens_plot = _plot_mean_tokens(summary, artifacts / "mean_token_usage.png") if not summary.empty else None
+    summary_plot = _plot_summary(summary, artifacts / "summary.png") if make_plots and not summary.empty else None
 
     # Tables
     summary_md = _df_to_markdown(summary) if not summary.empty else "(no summary)"
     sample_rows = results_df.head(10) if not results_df.empty else pd.DataFrame()
     sample_md = _df_to_markdown(sample_rows) if not sample_rows.empty else "(no samples)"
 
-    # Attach raw logs (best-effort)
+    # Attach raw logs (best-effort); safety events are written from a background thread
+    flush_safety_log()
     attached: List[str] = []
     for candidate in [
         Path("logs/experiment_runs.jsonl"),
@@ -167,10 +179,8 @@ def generate_report(results_df: pd.DataFrame, config: Dict[str, object], output_
 
     # Results
     md_lines.append("## Results\n")
-    if success_plot:
-        md_lines.append("![Success Rate](artifacts/success_rate.png)\n")
-    if tokens_plot:
-        md_lines.append("![Mean Token Usage](artifacts/mean_token_usage.png)\n")
+    if summary_plot:
+        md_lines.append("![Success Rate and Mean Token Usage](artifacts/summary.png)\n")
 
     md_lines.append("### Summary Table\n")
     md_lines.append(summary_md + "\n")
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 import json
+import weakref
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
 
 @dataclass
 class TokenUsage:
@@ -38,17 +44,33 @@ class RunLog:
     subtasks: List[SubtaskLog] = field(default_factory=list)
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self), ensure_ascii=False)
+        return self.to_json_bytes().decode("utf-8")
+
+    def to_json_bytes(self) -> bytes:
+        # orjson serializes dataclasses natively (no asdict copy) straight to UTF-8
+        if orjson is not None:
+            return orjson.dumps(self)
+        return json.dumps(asdict(self), ensure_ascii=False).encode("utf-8")
 
 
 class JsonlLogger:
+    """Appends RunLogs as JSON lines through one persistent, unbuffered handle.
+
+    Each log_run is a single write, so the record is on disk when it returns and a
+    forked child has no buffered lines to write again.
+    """
+
     def __init__(self, log_path: Path) -> None:
         self.log_path = log_path
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.log_path.open("ab", buffering=0)
+        self._finalizer = weakref.finalize(self, self._fh.close)
 
     def log_run(self, run: RunLog) -> None:
-        with self.log_path.open("a", encoding="utf-8") as f:
-            f.write(run.to_json() + "\n")
+        self._fh.write(run.to_json_bytes() + b"\n")
+
+    def close(self) -> None:
+        self._finalizer()
 
     @staticmethod
     def now_iso() -> str: